@@ -5,17 +5,19 @@ import mplfinance as mpf
 from binance.um_futures import UMFutures
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
 from scipy.spatial.distance import euclidean
+from klinestore import KlineStore
 
 # Binance client
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+store = KlineStore(client=client)
 
 later_candles = 20
 
 def get_historical_klines(symbol, interval, limit=1000):
     """Belirtilen sembol için Open, High, Low ve Close fiyatlarını alır."""
-    klines = client.klines(symbol=symbol, interval=interval, limit=limit)
-    ohlc = np.array([[float(k[1]), float(k[2]), float(k[3]), float(k[4])] for k in klines])  # Open, High, Low, Close
-    timestamps = np.array([int(k[0]) for k in klines])  # Zaman damgaları (milisaniye cinsinden)
+    klines = store.load(symbol, interval, limit)
+    ohlc = klines.values[:4].T  # Open, High, Low, Close
+    timestamps = klines.time  # Zaman damgaları (milisaniye cinsinden)
     return timestamps, ohlc
 
 def find_most_similar_patterns(symbol, interval="15m", window=20, top_n=8):
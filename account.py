@@ -0,0 +1,111 @@
+import time
+from binance.error import ClientError
+
+MARGIN_TYPES = {'isolated': 'ISOLATED', 'cross': 'CROSSED', 'crossed': 'CROSSED'}
+
+
+class AccountSnapshot:
+    # Positions, balances and open orders fetched once per tick and answered from memory.
+    # Order placement on the session calls invalidate(), so the next query refetches.
+    def __init__(self, session, max_age=30):
+        self.session = session
+        self.max_age = max_age
+        self.positions = {}
+        self.balances = {}
+        self.orders = {}
+        self.fetched_at = 0
+        self.valid = False
+        session.snapshot = self
+
+    def load(self, balances, positions, orders):
+        self.balances = {elem['asset']: float(elem['balance']) for elem in balances}
+        self.positions = {elem['symbol']: elem for elem in positions}
+        self.orders = {}
+        for elem in orders:
+            self.orders.setdefault(elem['symbol'], []).append(elem)
+        self.fetched_at = time.time()
+        self.valid = True
+
+    def refresh(self):
+        try:
+            self.load(*self.session.fetch_account_state())
+            return True
+        except ClientError as error:
+            print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+            return False
+
+    def invalidate(self):
+        self.valid = False
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def is_fresh(self):
+        return self.valid and self.age() <= self.max_age
+
+    def ensure(self):
+        if not self.is_fresh():
+            self.refresh()
+
+    def get_balance(self, asset='USDT'):
+        self.ensure()
+        return self.balances.get(asset)
+
+    def get_positions(self):
+        self.ensure()
+        return [symbol for symbol, elem in self.positions.items() if float(elem['positionAmt']) != 0]
+
+    def get_position(self, symbol):
+        self.ensure()
+        return self.positions.get(symbol)
+
+    def get_position_side(self, symbol):
+        elem = self.get_position(symbol)
+        if elem is None:
+            return None
+        entry = float(elem['entryPrice'])
+        liquidation = float(elem['liquidationPrice'])
+        if entry - liquidation > 0:
+            return "BUY"
+        if entry - liquidation < 0:
+            return "SELL"
+
+    def get_position_size_usdt(self, symbol):
+        elem = self.get_position(symbol)
+        if elem is not None:
+            return float(elem['notional'])
+
+    def get_orders(self, symbol=None):
+        self.ensure()
+        if symbol is not None:
+            return self.orders.get(symbol, [])
+        return [order for orders in self.orders.values() for order in orders]
+
+    def check_orders(self):
+        return [order['symbol'] for order in self.get_orders()]
+
+
+class SymbolConfig:
+    # Last known leverage and margin type per symbol, so unchanged settings are not re-sent
+    def __init__(self):
+        self.leverage = {}
+        self.margin_type = {}
+
+    def seed(self, positions):
+        for elem in positions:
+            if 'leverage' in elem:
+                self.leverage[elem['symbol']] = int(elem['leverage'])
+            if 'marginType' in elem:
+                self.margin_type[elem['symbol']] = MARGIN_TYPES.get(elem['marginType'].lower(), elem['marginType'].upper())
+
+    def needs_leverage(self, symbol, level):
+        return self.leverage.get(symbol) != int(level)
+
+    def needs_mode(self, symbol, type):
+        return self.margin_type.get(symbol) != MARGIN_TYPES.get(type.lower(), type.upper())
+
+    def set_leverage(self, symbol, level):
+        self.leverage[symbol] = int(level)
+
+    def set_mode(self, symbol, type):
+        self.margin_type[symbol] = MARGIN_TYPES.get(type.lower(), type.upper())
@@ -1,87 +1,57 @@
 import asyncio
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-import aiohttp
 import pandas as pd
 import numpy as np
+from transport import Transport
+from scan import register
+from universe import shared
+from indicators import last_rsi, wilder_rsi
 
 
 BINANCE_FUTURES_BASE = "https://fapi.binance.com"
-
-async def fetch(session, url):
-    try:
-        async with session.get(url, timeout=10) as response:
-            return await response.json()
-    except Exception as e:
-        print(f"Fetch error {url}: {e}")
-        return None
+universe = shared(BINANCE_FUTURES_BASE)
 
 def compute_rsi(prices, period=14):
-    deltas = np.diff(prices)
-    seed = deltas[:period]
-    up = seed[seed >= 0].sum() / period
-    down = -seed[seed < 0].sum() / period
-    rs = up / down if down != 0 else 0
-    rsi = np.zeros_like(prices)
-    rsi[:period] = 100. - 100. / (1. + rs)
-
-    for i in range(period, len(prices)):
-        delta = deltas[i - 1]
-        if delta > 0:
-            upval = delta
-            downval = 0.
-        else:
-            upval = 0.
-            downval = -delta
-
-        up = (up * (period - 1) + upval) / period
-        down = (down * (period - 1) + downval) / period
-
-        rs = up / down if down != 0 else 0
-        rsi[i] = 100. - 100. / (1. + rs)
-
-    return rsi
+    # prices tek seri ya da (sembol x zaman) matrisi olabilir
+    return wilder_rsi(prices, period)
 
 async def get_high_volume_symbols(session, min_volume_usd=50_000_000):
-    url = f"{BINANCE_FUTURES_BASE}/fapi/v1/ticker/24hr"
-    data = await fetch(session, url)
-    if not data:
-        return []
-
-    symbols = []
-    for item in data:
-        symbol = item['symbol']
-        if not symbol.endswith('USDT'):
-            continue
-        quote_volume = float(item.get('quoteVolume', 0))  # quoteVolume zaten USDT cinsinden
-        if quote_volume >= min_volume_usd:
-            symbols.append(symbol)
-    return symbols
-
-async def score_coin(session, symbol):
+    # quoteVolume zaten USDT cinsinden
+    return await universe.symbols(session, min_volume=min_volume_usd)
+
+async def get_closes(session, symbol):
     try:
         url_15m = f"{BINANCE_FUTURES_BASE}/fapi/v1/klines?symbol={symbol}&interval=15m&limit=100"
         url_4h = f"{BINANCE_FUTURES_BASE}/fapi/v1/klines?symbol={symbol}&interval=4h&limit=100"
-        url_funding = f"{BINANCE_FUTURES_BASE}/fapi/v1/premiumIndex?symbol={symbol}"
-        url_oi = f"{BINANCE_FUTURES_BASE}/futures/data/openInterestHist?symbol={symbol}&period=5m&limit=20"
 
-        responses = await asyncio.gather(
-            fetch(session, url_15m),
-            fetch(session, url_4h),
-            fetch(session, url_funding),
-            fetch(session, url_oi)
+        klines_15m, klines_4h = await asyncio.gather(
+            session.get(url_15m),
+            session.get(url_4h)
         )
 
-        klines_15m, klines_4h, funding_data, oi_data = responses
-
-        if not klines_15m or not klines_4h or not funding_data or not oi_data:
+        if not klines_15m or not klines_4h:
             return None
 
-        closes_15m = [float(k[4]) for k in klines_15m]
-        closes_4h = [float(k[4]) for k in klines_4h]
+        closes_15m = np.array([float(k[4]) for k in klines_15m])
+        closes_4h = np.array([float(k[4]) for k in klines_4h])
+        return closes_15m, closes_4h
+    except Exception as e:
+        print(f"Error fetching {symbol}: {e}")
+        return None
 
-        rsi_15m = compute_rsi(np.array(closes_15m))[-1]
-        rsi_4h = compute_rsi(np.array(closes_4h))[-1]
+async def score_rsi(session, symbol, rsi_15m, rsi_4h):
+    try:
+        url_funding = f"{BINANCE_FUTURES_BASE}/fapi/v1/premiumIndex?symbol={symbol}"
+        url_oi = f"{BINANCE_FUTURES_BASE}/futures/data/openInterestHist?symbol={symbol}&period=5m&limit=20"
+
+        funding_data, oi_data = await asyncio.gather(
+            session.get(url_funding),
+            session.get(url_oi)
+        )
+
+        if not funding_data or not oi_data:
+            return None
 
         funding_rate = float(funding_data.get("lastFundingRate", 0))
 
@@ -122,13 +92,30 @@ async def score_coin(session, symbol):
         print(f"Error scoring {symbol}: {e}")
         return None
 
+@register("alla2", {"15m": 100, "4h": 100}, min_volume=50_000_000)
+async def scan(session, symbol, klines):
+    r = await score_rsi(session, symbol, compute_rsi(klines["15m"].close)[-1], compute_rsi(klines["4h"].close)[-1])
+    if r is None or r["score"] == 0:
+        return None
+    side = "bullish" if r["score"] > 0 else "bearish"
+    text = (f"Score: {r['score']} | RSI 15m: {r['rsi_15m']} | RSI 4h: {r['rsi_4h']} | "
+            f"Funding: {r['funding_rate']} | OI: %{r['oi_change_pct']}")
+    return [("15m/4h", text, side, abs(r["score"]))]
+
 async def main():
-    async with aiohttp.ClientSession() as session:
+    async with Transport(BINANCE_FUTURES_BASE) as session:
         print("Coinleri hacime göre filtreliyorum...")
         symbols = await get_high_volume_symbols(session)
         print(f"Toplam {len(symbols)} coin bulundu.")
 
-        tasks = [score_coin(session, symbol) for symbol in symbols]
+        closes = await asyncio.gather(*(get_closes(session, symbol) for symbol in symbols))
+        pairs = [(symbol, c) for symbol, c in zip(symbols, closes) if c is not None]
+
+        # 15m ve 4h RSI'ları bütün coinler için tek seferde
+        rsi_15m = last_rsi([c[0] for _, c in pairs])
+        rsi_4h = last_rsi([c[1] for _, c in pairs])
+
+        tasks = [score_rsi(session, symbol, r15, r4) for (symbol, _), r15, r4 in zip(pairs, rsi_15m, rsi_4h)]
         results = await asyncio.gather(*tasks)
 
     df = pd.DataFrame([r for r in results if r])
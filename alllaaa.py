@@ -1,79 +1,63 @@
 import asyncio
-import aiohttp
-import numpy as np
 from colorama import Fore, Style
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinedecode import decode
+from transport import Transport
+from scan import register
+from indicators import last_rsi, wilder_rsi
+from universe import shared
 
 BASE_URL = "https://fapi.binance.com"
+universe = shared(BASE_URL)
 
 headers = {
     "X-MBX-APIKEY": BINANCE_API_KEY
 }
 
-asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+# Akış (KlineStream, 15m, size=100) get_klines'ta REST'ten önce denenir
+stream = None
 
-async def fetch(session, url, params=None):
-    try:
-        async with session.get(url, params=params, headers=headers, timeout=10) as response:
-            return await response.json()
-    except Exception as e:
-        print(f"Fetch error: {e}")
-        return None
+asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 async def get_high_volume_symbols(session, min_volume=100_000_000):
-    url = f"{BASE_URL}/fapi/v1/ticker/24hr"
-    tickers = await fetch(session, url)
-    if tickers is None:
-        return []
-    return [
-        t['symbol'] for t in tickers
-        if t['symbol'].endswith("USDT") and float(t['quoteVolume']) >= min_volume
-    ]
+    return await universe.symbols(session, min_volume=min_volume)
 
 async def get_klines(session, symbol, interval="15m", limit=100):
+    if stream is not None:
+        candles = stream.klines(symbol, interval, limit)
+        if candles is not None:
+            return candles
     url = f"{BASE_URL}/fapi/v1/klines"
     params = {"symbol": symbol, "interval": interval, "limit": limit}
-    return await fetch(session, url, params)
+    payload = await session.get(url, params, raw=True)
+    if payload is None:
+        return None
+    try:
+        return decode(payload)
+    except ValueError:
+        return None
 
 def calculate_rsi(closes, period=14):
-    closes = np.array(closes, dtype=float)
-    deltas = np.diff(closes)
-    seed = deltas[:period]
-    up = seed[seed >= 0].sum() / period
-    down = -seed[seed < 0].sum() / period
-    rs = up / down if down != 0 else 0
-    rsi = np.zeros_like(closes)
-    rsi[:period] = 50  # ilk değer ortalama
-
-    for i in range(period, len(closes)):
-        delta = deltas[i - 1]
-        if delta > 0:
-            up_val = delta
-            down_val = 0
-        else:
-            up_val = 0
-            down_val = -delta
-        up = (up * (period - 1) + up_val) / period
-        down = (down * (period - 1) + down_val) / period
-        rs = up / down if down != 0 else 0
-        rsi[i] = 100 - 100 / (1 + rs)
-    return rsi
+    # closes tek seri ya da (sembol x zaman) matrisi olabilir
+    return wilder_rsi(closes, period, head=50)  # ilk değerler ortalama
 
 async def analyze_symbol(session, symbol):
     klines = await get_klines(session, symbol, "15m", 100)
     if klines is None or len(klines) < 20:
         return None
+    return score_shortable(symbol, klines)
 
-    closes = [float(c[4]) for c in klines]
-    highs = [float(c[2]) for c in klines]
-    lows = [float(c[3]) for c in klines]
+def score_shortable(symbol, klines, rsi_value=None):
+    closes = klines.close
+    highs = klines.high
+    lows = klines.low
 
     last_close = closes[-1]
     last_high = highs[-1]
     last_low = lows[-1]
 
-    rsi = calculate_rsi(closes)
-    last_rsi = rsi[-1]
+    if rsi_value is None:
+        rsi_value = calculate_rsi(closes)[-1]
 
     # Fiyat son zamanlarda tepe yaptı mı?
     local_top = (last_close < highs[-2]) and (highs[-2] > highs[-3])
@@ -85,7 +69,7 @@ async def analyze_symbol(session, symbol):
 
     # Kriter: RSI yüksek + local tepe var + wick uzun
     score = 0
-    if last_rsi > 65:   
+    if rsi_value > 65:   
         score += 1
     if local_top:
         score += 1
@@ -93,16 +77,30 @@ async def analyze_symbol(session, symbol):
         score += 1
 
     if score >= 2:
-        return (symbol, last_rsi, score)
+        return (symbol, rsi_value, score)
     return None
 
+@register("shortables", {"15m": 100}, top=5)
+async def scan(session, symbol, klines):
+    res = score_shortable(symbol, klines["15m"])
+    if res is None:
+        return None
+    _, rsi_value, score = res
+    # Skor önce, eşitlikte RSI
+    return [("15m", f"RSI: {rsi_value:.2f} | Score: {score}", "bearish", score * 1000 + rsi_value)]
+
 async def find_top_shortables():
-    async with aiohttp.ClientSession() as session:
+    async with Transport(headers=headers) as session:
         symbols = await get_high_volume_symbols(session)
         print(f"{len(symbols)} sembol taranıyor...")
 
-        tasks = [analyze_symbol(session, symbol) for symbol in symbols]
-        results = await asyncio.gather(*tasks)
+        tasks = [get_klines(session, symbol, "15m", 100) for symbol in symbols]
+        candles = await asyncio.gather(*tasks)
+
+        # Bütün sembollerin RSI'ı tek matris üzerinden hesaplanır
+        pairs = [(symbol, k) for symbol, k in zip(symbols, candles) if k is not None and len(k) >= 20]
+        rsi = last_rsi([k.close for _, k in pairs], head=50)
+        results = [score_shortable(symbol, k, r) for (symbol, k), r in zip(pairs, rsi)]
 
         valid_results = [r for r in results if r is not None]
         sorted_results = sorted(valid_results, key=lambda x: (-x[2], -x[1]))  # skor ve RSI'ya göre sırala
@@ -0,0 +1,318 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from urllib.parse import urlencode
+import aiohttp
+from binance.um_futures import UMFutures
+from binance.error import ClientError
+from helper import Binance, to_str
+from symbolinfo import shared
+from account import SymbolConfig
+from klinedecode import to_frame
+
+BASE_URL = "https://fapi.binance.com"
+
+
+def print_error(error):
+    print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+
+
+class AsyncBinance:
+    def __init__(self, api, secret, base_url=BASE_URL):
+        self.api = api
+        self.secret = secret
+        self.base_url = base_url
+        self.session = None
+        self.symbols = shared(UMFutures())
+        self.snapshot = None
+        self.config = SymbolConfig()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        if self.session is None or self.session.closed:
+            # One keep-alive pool for every request of this account
+            connector = aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-MBX-APIKEY": self.api},
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def sign(self, params):
+        params = {k: v for k, v in params.items() if v is not None}
+        params['timestamp'] = int(time.time() * 1000)
+        query = urlencode(params)
+        signature = hmac.new(self.secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        return f"{query}&signature={signature}"
+
+    async def request(self, method, path, params=None, signed=False, raw=False):
+        await self.open()
+        params = params or {}
+        if signed:
+            url = f"{self.base_url}{path}?{self.sign(params)}"
+            params = None
+        else:
+            url = f"{self.base_url}{path}"
+        async with self.session.request(method, url, params=params) as resp:
+            body = await resp.read()
+            if resp.status >= 400:
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    # HTML/plain-text bodies from the gateway (e.g. 502, WAF 403)
+                    raise ClientError(resp.status, None, body.decode(errors='replace'), dict(resp.headers))
+                raise ClientError(resp.status, data.get('code'), data.get('msg'), dict(resp.headers))
+            return body if raw else json.loads(body)
+
+    async def get_balance_usdt(self):
+        try:
+            response = await self.request("GET", "/fapi/v2/balance", {'recvWindow': 10000}, signed=True)
+            for elem in response:
+                if elem['asset'] == 'USDT':
+                    return float(elem['balance'])
+        except ClientError as error:
+            print_error(error)
+
+    async def get_position_risk(self, symbol=None):
+        resp = await self.request("GET", "/fapi/v2/positionRisk", {'symbol': symbol, 'recvWindow': 10000}, signed=True)
+        self.config.seed(resp)
+        return resp
+
+    async def get_positions(self):
+        try:
+            resp = await self.get_position_risk()
+            return [elem['symbol'] for elem in resp if float(elem['positionAmt']) != 0]
+        except ClientError as error:
+            print_error(error)
+
+    async def get_position_side(self, symbol):
+        try:
+            resp = await self.get_position_risk(symbol)
+            entry = float(resp[0]['entryPrice'])
+            liquidation = float(resp[0]['liquidationPrice'])
+            if entry - liquidation > 0:
+                return "BUY"
+            if entry - liquidation < 0:
+                return "SELL"
+        except ClientError as error:
+            print_error(error)
+
+    async def get_position_size_usdt(self, symbol):
+        try:
+            resp = await self.get_position_risk(symbol)
+            return float(resp[0]['notional'])
+        except ClientError as error:
+            print_error(error)
+
+    async def check_orders(self):
+        try:
+            response = await self.request("GET", "/fapi/v1/openOrders", {'recvWindow': 10000}, signed=True)
+            return [elem['symbol'] for elem in response]
+        except ClientError as error:
+            print_error(error)
+
+    async def fetch_account_state(self):
+        return await asyncio.gather(
+            self.request("GET", "/fapi/v2/balance", {'recvWindow': 10000}, signed=True),
+            self.get_position_risk(),
+            self.request("GET", "/fapi/v1/openOrders", {'recvWindow': 10000}, signed=True),
+        )
+
+    def invalidate(self):
+        if self.snapshot is not None:
+            self.snapshot.invalidate()
+
+    async def get_account(self):
+        # Balance, positions and open orders in one round trip
+        return await asyncio.gather(self.get_balance_usdt(), self.get_positions(), self.check_orders())
+
+    async def close_open_orders(self, symbol):
+        self.invalidate()
+        try:
+            response = await self.request("DELETE", "/fapi/v1/allOpenOrders", {'symbol': symbol, 'recvWindow': 10000}, signed=True)
+            print(response)
+        except ClientError as error:
+            print_error(error)
+
+    async def get_tickers_usdt(self):
+        try:
+            resp = await self.request("GET", "/fapi/v1/ticker/price")
+            return [elem['symbol'] for elem in resp if 'USDT' in elem['symbol']]
+        except ClientError as error:
+            print_error(error)
+
+    async def get_pnl(self, limit):
+        try:
+            resp = await self.request("GET", "/fapi/v1/income", {'incomeType': "REALIZED_PNL", 'limit': limit, 'recvWindow': 10000}, signed=True)
+            return sum(float(elem['income']) for elem in resp)
+        except ClientError as error:
+            print_error(error)
+
+    async def klines(self, symbol, timeframe, limit=500):
+        try:
+            data = await self.request("GET", "/fapi/v1/klines", {'symbol': symbol, 'interval': timeframe, 'limit': limit}, raw=True)
+            return to_frame(data, columns=['Open', 'High', 'Low', 'Close', 'Volume'], index_name='Time')
+        except ClientError as error:
+            print_error(error)
+
+    async def set_leverage(self, symbol, level):
+        if not self.config.needs_leverage(symbol, level):
+            return
+        try:
+            response = await self.request("POST", "/fapi/v1/leverage", {'symbol': symbol, 'leverage': level, 'recvWindow': 10000}, signed=True)
+            self.config.set_leverage(symbol, level)
+            print(response)
+        except ClientError as error:
+            print_error(error)
+
+    async def set_mode(self, symbol, type):
+        if not self.config.needs_mode(symbol, type):
+            return
+        try:
+            response = await self.request("POST", "/fapi/v1/marginType", {'symbol': symbol, 'marginType': type, 'recvWindow': 10000}, signed=True)
+            self.config.set_mode(symbol, type)
+            print(response)
+        except ClientError as error:
+            if error.error_code == -4046:
+                self.config.set_mode(symbol, type)
+                return
+            print_error(error)
+
+    async def get_symbol_info(self, symbol):
+        # SymbolInfo.get with the download made on this session
+        info, download = self.symbols.lookup(symbol)
+        if download:
+            try:
+                self.symbols.update(await self.request("GET", "/fapi/v1/exchangeInfo"))
+            except ClientError as error:
+                print_error(error)
+            info = self.symbols.resolve(symbol)
+        return info
+
+    async def get_precisions(self, symbol):
+        info = await self.get_symbol_info(symbol)
+        if info is not None:
+            return info['pricePrecision'], info['quantityPrecision']
+
+    async def get_commission(self, symbol):
+        try:
+            resp = await self.request("GET", "/fapi/v1/commissionRate", {'symbol': symbol, 'recvWindow': 10000}, signed=True)
+            return float(resp['makerCommissionRate']), float(resp['takerCommissionRate'])
+        except ClientError as error:
+            print_error(error)
+
+    async def get_price(self, symbol):
+        resp = await self.request("GET", "/fapi/v1/ticker/price", {'symbol': symbol})
+        return float(resp['price'])
+
+    async def send_order(self, order):
+        try:
+            return await self.request("POST", "/fapi/v1/order", {**order, 'recvWindow': 10000}, signed=True)
+        except ClientError as error:
+            return {'code': error.error_code, 'msg': error.error_message}
+
+    async def send_orders_batch(self, orders):
+        batch = json.dumps([{k: to_str(v) for k, v in order.items()} for order in orders], separators=(',', ':'))
+        try:
+            return await self.request("POST", "/fapi/v1/batchOrders", {'batchOrders': batch, 'recvWindow': 10000}, signed=True)
+        except ClientError as error:
+            print_error(error)
+            return await asyncio.gather(*(self.send_order(order) for order in orders))
+
+    async def prepare_order(self, symbol, volume, leverage, mode):
+        self.invalidate()
+        # Leverage, margin mode, price and precisions do not depend on each other
+        _, _, price, precisions = await asyncio.gather(
+            self.set_leverage(symbol, leverage),
+            self.set_mode(symbol, mode),
+            self.get_price(symbol),
+            self.get_precisions(symbol),
+        )
+        if precisions is None:
+            print(f"{symbol}: symbol info not found")
+            return None
+        price_precision, qty_precision = precisions
+        return price, price_precision, round(volume / price, qty_precision)
+
+    async def open_order_market(self, symbol, side, volume, leverage, mode, tp, sl):
+        # Same contract as Binance.open_bracket: None when an unprotected entry had to be closed
+        prepared = await self.prepare_order(symbol, volume, leverage, mode)
+        if prepared is None or side not in ('buy', 'sell'):
+            return
+        price, price_precision, qty = prepared
+        legs = Binance.bracket_legs(symbol, side, qty, price, price_precision, tp, sl)
+        results = await self.send_orders_batch(legs)
+        failed = [i for i, resp in enumerate(results) if 'code' in resp]
+        if failed:
+            for i in failed:
+                print(f"{legs[i]['type']} leg failed: {results[i]['code']} {results[i]['msg']}")
+            retry = await asyncio.gather(*(self.send_order(legs[i]) for i in failed))
+            for i, resp in zip(failed, retry):
+                results[i] = resp
+        for leg, resp in zip(legs, results):
+            print(leg['type'], resp)
+        if 'code' in results[0]:
+            await self.close_open_orders(symbol)
+        elif any('code' in resp for resp in results[1:]):
+            print(f"{symbol} position has no stop/take profit, closing it")
+            await self.close_open_orders(symbol)
+            print(await self.send_order(Binance.unwind_order(legs)))
+            return None
+        return results
+
+    async def open_order_market_nostops(self, symbol, side, volume, leverage, mode):
+        prepared = await self.prepare_order(symbol, volume, leverage, mode)
+        if prepared is None or side not in ('buy', 'sell'):
+            return
+        _, _, qty = prepared
+        resp = await self.send_order({'symbol': symbol, 'side': side.upper(), 'type': 'MARKET', 'quantity': qty})
+        print(resp)
+        return resp
+
+
+class SyncBinance:
+    # Blocking wrapper so scripts written against helper.Binance keep working.
+    # The event loop lives on its own thread and keeps the session warm between calls.
+    def __init__(self, api, secret):
+        self.session = AsyncBinance(api, secret)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def snapshot(self):
+        return self.session.snapshot
+
+    @snapshot.setter
+    def snapshot(self, value):
+        self.session.snapshot = value
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def __getattr__(self, name):
+        attr = getattr(self.session, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self.run(attr(*args, **kwargs))
+        return call
+
+    def close(self):
+        self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
@@ -1,97 +1,84 @@
-import requests
 import pandas as pd
 import numpy as np
-import ta
+from numpy.lib.stride_tricks import sliding_window_view
+from klinestore import KlineStore
+from indicators import macd
+from backtester import SIGNAL, STOP_LOSS, TAKE_PROFIT, resolve_from_store, simulate
+from resample import interval_ms
+
+store = KlineStore()
+
+SYMBOL = "BTCUSDT"
+INTERVAL = "1h"
+
+EXIT_TYPES = {STOP_LOSS: "LONG_EXIT_STOP_LOSS", TAKE_PROFIT: "LONG_EXIT_TAKE_PROFIT", SIGNAL: "LONG_EXIT_SIGNAL"}
 
 def get_binance_futures_klines(symbol="BTCUSDT", interval="1h", limit=1000):
-    url = f"https://fapi.binance.com/fapi/v1/klines?symbol={symbol}&interval={interval}&limit={limit}"
-    response = requests.get(url)
-    data = response.json()
-    df = pd.DataFrame(data, columns=[
-        "Open time", "Open", "High", "Low", "Close", "Volume",
-        "Close time", "Quote asset volume", "Number of trades",
-        "Taker buy base asset volume", "Taker buy quote asset volume", "Ignore"
-    ])
-    df["Close"] = df["Close"].astype(float)
-    df["High"] = df["High"].astype(float)
-    df["Low"] = df["Low"].astype(float)
-    df["Volume"] = df["Volume"].astype(float)
-    df["Open time"] = pd.to_datetime(df["Open time"], unit='ms')
-    return df
+    df = store.frame(symbol, interval, limit, columns=["Open", "High", "Low", "Close", "Volume"], index_name="Open time")
+    return df.reset_index()
 
 def EFI(close, volume, period=13):
-    price_change = close.diff()
-    volume_sign = volume.copy()
-    volume_sign[price_change > 0] = volume[price_change > 0]
-    volume_sign[price_change < 0] = -volume[price_change < 0]
-    volume_sign[price_change == 0] = 0
-    efi = volume_sign.rolling(window=period).sum() / volume.rolling(window=period).sum()
+    # Hacim, fiyat değişiminin yönüyle işaretlenir; ilk mumun değişimi bilinmediği için hacmi + kalır
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    price_change = np.diff(close, prepend=np.nan)
+    volume_sign = np.where(price_change < 0, -volume, np.where(price_change == 0, 0.0, volume))
+    efi = np.full(len(close), np.nan)
+    if len(close) >= period:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            efi[period - 1:] = (sliding_window_view(volume_sign, period).sum(axis=1) /
+                                sliding_window_view(volume, period).sum(axis=1))
     return efi
 
-df = get_binance_futures_klines()
+def shift(x):
+    return np.concatenate([[np.nan], x[:-1]])
+
+def signals(close, volume, efi_period=13, fast=12, slow=26, signal=9):
+    return cross_signals(EFI(close, volume, efi_period), *macd(close, fast, slow, signal))
+
+def cross_signals(efi, line, signal):
+    # EFI yönünde MACD kesişimi
+    long_signal = (efi > 0) & (line > signal) & (shift(line) <= shift(signal))
+    short_signal = (efi < 0) & (line < signal) & (shift(line) >= shift(signal))
+    return long_signal, short_signal
 
-df['EFI_13'] = EFI(df['Close'], df['Volume'], 13)
+def trade_table(trades, times):
+    # Giriş ve çıkış satırları sırayla; sadece son işlem açık kalabilir
+    if len(trades.entry) == 0:
+        return pd.DataFrame()
+    closed = trades.exit >= 0
+    rows = len(trades.entry) + int(closed.sum())
+    types = np.empty(rows, dtype=object)
+    result = np.full(rows, np.nan, dtype=object)
+    prices = np.empty(rows)
+    time = np.empty(rows, dtype=times.dtype)
+    types[0::2], time[0::2], prices[0::2] = "LONG_ENTRY", times[trades.entry], trades.entry_price
+    reason = trades.reason[closed]
+    types[1::2] = [EXIT_TYPES[r] for r in reason]
+    time[1::2] = times[trades.exit[closed]]
+    prices[1::2] = trades.exit_price[closed]
+    win = (reason == TAKE_PROFIT) | ((reason == SIGNAL) & (trades.exit_price[closed] > trades.entry_price[closed]))
+    result[1::2] = np.where(win, "win", "lose")
+    table = {"Type": types, "Time": time, "Price": prices}
+    if closed.any():
+        table["Result"] = result
+    return pd.DataFrame(table)
 
-macd = ta.trend.MACD(df['Close'])
-df['MACD'] = macd.macd()
-df['MACD_signal'] = macd.macd_signal()
+if __name__ == "__main__":
+    df = get_binance_futures_klines(SYMBOL, INTERVAL)
 
-df['long_signal'] = (df['EFI_13'] > 0) & (df['MACD'] > df['MACD_signal']) & (df['MACD'].shift(1) <= df['MACD_signal'].shift(1))
-df['short_signal'] = (df['EFI_13'] < 0) & (df['MACD'] < df['MACD_signal']) & (df['MACD'].shift(1) >= df['MACD_signal'].shift(1))
+    long_signal, short_signal = signals(df['Close'].values, df['Volume'].values, 13)
 
-position = 0
-entry_price = 0
-stop_loss = 0
-take_profit = 0
-trades = []
+    # %2 stop loss, %2 take profit; aynı mumda ikisi de varsa stop önce sayılır, sonra çıkış sinyali
+    trades = simulate(df['High'].values, df['Low'].values, df['Close'].values, long_signal,
+                      tp=0.02, sl=0.02, long_exit=short_signal)
 
-for idx, row in df.iterrows():
-    if position == 0:
-        if row['long_signal']:
-            position = 1
-            entry_price = row['Close']
-            stop_loss = entry_price * (1 - 0.02)  # %2 stop loss
-            take_profit = entry_price * (1 + 0.02)  # %2 take profit
-            trades.append({
-                "Type": "LONG_ENTRY",
-                "Time": row["Open time"],
-                "Price": entry_price
-            })
-    elif position == 1:
-        # Stop loss ya da take profit gerçekleştiyse pozisyonu kapat
-        if row['Low'] <= stop_loss:
-            exit_price = stop_loss
-            result = "lose"
-            trades.append({
-                "Type": "LONG_EXIT_STOP_LOSS",
-                "Time": row["Open time"],
-                "Price": exit_price,
-                "Result": result
-            })
-            position = 0
-        elif row['High'] >= take_profit:
-            exit_price = take_profit
-            result = "win"
-            trades.append({
-                "Type": "LONG_EXIT_TAKE_PROFIT",
-                "Time": row["Open time"],
-                "Price": exit_price,
-                "Result": result
-            })
-            position = 0
-        # Eğer stop loss ya da take profit gerçekleşmediyse, çıkış sinyali varsa kapat
-        elif row['short_signal']:
-            exit_price = row['Close']
-            result = "win" if exit_price > entry_price else "lose"
-            trades.append({
-                "Type": "LONG_EXIT_SIGNAL",
-                "Time": row["Open time"],
-                "Price": exit_price,
-                "Result": result
-            })
-            position = 0
+    # İkisi de aynı mumdaysa depodaki 1m mumlarından hangisinin önce geldiğine bakılır (1m verisi yoksa stop)
+    open_time = df['Open time'].values.astype('datetime64[ms]').astype(np.int64)
+    trades = resolve_from_store(trades, df['High'].values, df['Low'].values, open_time,
+                                open_time + interval_ms(INTERVAL) - 1, 0.02, 0.02, store, SYMBOL)
 
-trades_df = pd.DataFrame(trades)
-trades_df.to_csv("backtest_trades_with_sl_tp.csv", index=False)
+    trades_df = trade_table(trades, df['Open time'].values)
+    trades_df.to_csv("backtest_trades_with_sl_tp.csv", index=False)
 
-print("İşlem kayıtları 'backtest_trades_with_sl_tp.csv' dosyasına kaydedildi.")
+    print("İşlem kayıtları 'backtest_trades_with_sl_tp.csv' dosyasına kaydedildi.")
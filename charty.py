@@ -1,23 +1,20 @@
 import time
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import ta
 import matplotlib.pyplot as plt
 from binance.um_futures import UMFutures
 from binance.error import ClientError
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinedecode import to_frame
+from backtester import STOP_LOSS, TAKE_PROFIT, columns, simulate
 
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
 
 def klines(symbol, interval):
     try:
-        resp = pd.DataFrame(client.klines(symbol, interval))
-        resp = resp.iloc[:, :6]
-        resp.columns = ['open_time', 'open', 'high', 'low', 'close', 'volume']
-        resp = resp.set_index('open_time')
-        resp.index = pd.to_datetime(resp.index, unit='ms')
-        resp = resp.astype(float)
-        return resp
+        return to_frame(client.klines(symbol, interval))
     except ClientError as error:
         print(f"Error: {error.error_message}")
         return None
@@ -34,24 +31,18 @@ def calculate_signal(df):
     # Hacim analizi: Ortalama hacmi al
     df['avg_volume'] = df['volume'].rolling(window=20).mean()
 
-    signals = []
-    
-    for i in range(1, len(df)):
-        # Alım sinyali: Fiyat EMA50'nin üzerinde, EMA50 > EMA200, fiyat VWAP'ı geçti, hacim ortalamanın üzerinde
-        if (df['close'].iloc[i] > df['ema_50'].iloc[i] and
-            df['ema_50'].iloc[i] > df['ema_200'].iloc[i] and
-            df['close'].iloc[i] > df['vwap'].iloc[i] and
-            df['volume'].iloc[i] > df['avg_volume'].iloc[i]):
-            signals.append(('buy', df.index[i], df['close'].iloc[i]))
+    close, ema_50, ema_200, vwap, volume, avg_volume = columns(
+        df, 'close', 'ema_50', 'ema_200', 'vwap', 'volume', 'avg_volume')
 
-        # Satım sinyali: Fiyat EMA50'nin altında, EMA50 < EMA200, fiyat VWAP'ın altında, hacim ortalamanın üzerinde
-        elif (df['close'].iloc[i] < df['ema_50'].iloc[i] and
-              df['ema_50'].iloc[i] < df['ema_200'].iloc[i] and
-              df['close'].iloc[i] < df['vwap'].iloc[i] and
-              df['volume'].iloc[i] > df['avg_volume'].iloc[i]):
-            signals.append(('sell', df.index[i], df['close'].iloc[i]))
+    # Alım sinyali: Fiyat EMA50'nin üzerinde, EMA50 > EMA200, fiyat VWAP'ı geçti, hacim ortalamanın üzerinde
+    buy = (close > ema_50) & (ema_50 > ema_200) & (close > vwap) & (volume > avg_volume)
+    # Satım sinyali: Fiyat EMA50'nin altında, EMA50 < EMA200, fiyat VWAP'ın altında, hacim ortalamanın üzerinde
+    sell = (close < ema_50) & (ema_50 < ema_200) & (close < vwap) & (volume > avg_volume) & ~buy
+    buy[0] = sell[0] = False
+    df['buy_signal'], df['sell_signal'] = buy, sell
 
-    return signals
+    index = np.flatnonzero(buy | sell)
+    return [('buy' if buy[i] else 'sell', df.index[i], close[i]) for i in index]
 
 def backtest(symbol, interval='5m', initial_balance=1000, trade_size_usd=50, leverage=20):
     df = klines(symbol, interval)
@@ -59,8 +50,6 @@ def backtest(symbol, interval='5m', initial_balance=1000, trade_size_usd=50, lev
         return
     
     balance = initial_balance
-    position = 0  # Pozisyon (pozitif: long, negatif: short)
-    entry_price = 0  # İşleme giriş fiyatı
     trades = []
     
     tp_percent = 0.02  # Take profit %2
@@ -72,30 +61,25 @@ def backtest(symbol, interval='5m', initial_balance=1000, trade_size_usd=50, lev
         print("No signals generated! Check your strategy or data.")
         return
     
-    for signal in signals:
-        signal_type, time, price = signal
-        trade_size = trade_size_usd / price  # Dolar bazlı pozisyon boyutu hesapla
-        
-        if signal_type == 'buy' and position == 0:
-            position = trade_size * leverage
-            entry_price = price
-            tp_price = entry_price * (1 + tp_percent)
-            sl_price = entry_price * (1 - sl_percent)
-            trades.append(('buy', time, entry_price))
-        
-        if position > 0:
-            if price >= tp_price:  # Take Profit (TP)
-                profit = (tp_price - entry_price) * trade_size * leverage
-                balance += profit
-                position = 0
-                trades.append(('sell_tp', time, tp_price, profit))
-            elif price <= sl_price:  # Stop Loss (SL)
-                loss = (entry_price - sl_price) * trade_size * leverage
-                balance -= loss
-                position = 0
-                trades.append(('sell_sl', time, sl_price, -loss))
+    # Çıkışlar her mumun high/low'u üzerinden aranır (aynı mumda TP önce); pozisyon büyüklüğü giriş fiyatından
+    high, low, close = columns(df, 'high', 'low', 'close')
+    result = simulate(high, low, close, df['buy_signal'].values, tp=tp_percent, sl=sl_percent, stop_first=False)
+
+    for entry, exit_bar, entry_price, exit_price, reason in zip(
+            result.entry, result.exit, result.entry_price, result.exit_price, result.reason):
+        trade_size = trade_size_usd / entry_price  # Dolar bazlı pozisyon boyutu hesapla
+        trades.append(('buy', df.index[entry], entry_price))
+        if reason == TAKE_PROFIT:
+            profit = (exit_price - entry_price) * trade_size * leverage
+            balance += profit
+            trades.append(('sell_tp', df.index[exit_bar], exit_price, profit))
+        elif reason == STOP_LOSS:
+            loss = (entry_price - exit_price) * trade_size * leverage
+            balance -= loss
+            trades.append(('sell_sl', df.index[exit_bar], exit_price, -loss))
     
     print(f"Final Balance: {balance:.2f} USDT")
     return trades, balance
 
-backtest('BTCUSDT', '5m')
+if __name__ == "__main__":
+    backtest('BTCUSDT', '5m')
@@ -1,37 +1,35 @@
 import asyncio
-import aiohttp
 import numpy as np
 import warnings
 from aiohttp import resolver
+from transport import Transport
+from klinecache import KlineCache
+from universe import shared
 
 BASE_URL = "https://fapi.binance.com"
+universe = shared(BASE_URL)
+cache = KlineCache()
 REFERENCE_SYMBOL = "BTCUSDT"
 INTERVAL = "1h"
 LIMIT = 100
 TOP_N = 6  # En yüksek korelasyonlu kaç tane yazılacak
 
 async def fetch_klines(session, symbol):
-    url = f"{BASE_URL}/fapi/v1/klines?symbol={symbol}&interval={INTERVAL}&limit={LIMIT}"
     try:
-        async with session.get(url) as response:
-            data = await response.json()
-            closes = [float(entry[4]) for entry in data]
-            if len(closes) == LIMIT:
-                return symbol, closes
-            else:
-                return symbol, None
+        klines = await cache.get_async(session, symbol, INTERVAL, LIMIT)
+        closes = klines.close.tolist()
+        if len(closes) == LIMIT:
+            return symbol, closes
+        else:
+            return symbol, None
     except:
         return symbol, None
 
 async def get_all_futures_symbols(session):
-    url = f"{BASE_URL}/fapi/v1/exchangeInfo"
-    async with session.get(url) as response:
-        data = await response.json()
-        return [s["symbol"] for s in data["symbols"] if s["quoteAsset"] == "USDT" and s["contractType"] == "PERPETUAL"]
+    return await universe.symbols(session, status=None)
 
 async def find_correlations():
-    connector = aiohttp.TCPConnector(resolver=resolver.ThreadedResolver())
-    async with aiohttp.ClientSession(connector=connector) as session:
+    async with Transport(resolver=resolver.ThreadedResolver()) as session:
         symbols = await get_all_futures_symbols(session)
 
         tasks = [fetch_klines(session, symbol) for symbol in symbols]
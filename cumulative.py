@@ -1,11 +1,18 @@
 import asyncio
-import aiohttp
+import numpy as np
 from colorama import Fore, Style
 from xconfig import BINANCE_API_KEY  # Binance API key’in burada olsun
+from klinedecode import concat, decode
+from resample import base_interval, base_limit, resample
+from transport import Transport
+from universe import shared
+from scan import register
+from indicators import wavetrend, wavetrend_cross
 
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 BASE_URL = "https://fapi.binance.com"
+universe = shared(BASE_URL)
 intervals = ["15m","30m","1h", "2h", "3h", "4h"]
 
 headers = {
@@ -14,107 +21,107 @@ headers = {
 
 blacklist = ["TRXUSDT", "BTCUSDT"]
 
-async def fetch(session, url, params=None):
-    try:
-        async with session.get(url, params=params, headers=headers, timeout=10) as response:
-            return await response.json()
-    except Exception as e:
-        print(f"Fetch error: {e}")
-        return None
+# KlineStream(size=1616) atanırsa 15m taban seri REST yerine halkadan gelir
+stream = None
 
 async def get_high_volume_symbols(session, min_volume=100_000_000):
-    url = f"{BASE_URL}/fapi/v1/ticker/24hr"
-    tickers = await fetch(session, url)
-    if tickers is None:
-        return []
-    return [
-        t['symbol'] for t in tickers
-        if t['symbol'].endswith("USDT") and float(t['quoteVolume']) >= min_volume and t['symbol'] not in blacklist
-    ]
+    return await universe.symbols(session, min_volume=min_volume, blacklist=blacklist)
 
 async def get_klines(session, symbol, interval="1h", limit=100):
+    if stream is not None:
+        candles = stream.klines(symbol, interval, limit)
+        if candles is not None:
+            return candles
     url = f"{BASE_URL}/fapi/v1/klines"
-    params = {"symbol": symbol, "interval": interval, "limit": limit}
-    data = await fetch(session, url, params)
-    if not data or len(data) < limit:
+    pages = []
+    remaining = limit
+    end_time = None
+    # Binance en fazla 1500 mum döndürür; fazlası için geriye doğru sayfala
+    while remaining > 0:
+        params = {"symbol": symbol, "interval": interval, "limit": min(remaining, 1500)}
+        if end_time is not None:
+            params["endTime"] = end_time
+        payload = await session.get(url, params, raw=True)
+        if payload is None:
+            return None
+        try:
+            page = decode(payload)
+        except ValueError:
+            return None
+        if len(page) == 0:
+            return None
+        pages.append(page)
+        remaining -= len(page)
+        if len(page) < params["limit"]:
+            break
+        end_time = int(page.time[0]) - 1
+    if remaining > 0:
         return None
-    return data
+    return concat(reversed(pages))
 
 def calculate_wavetrend(klines, n1=9, n2=12):
-    closes = [float(k[4]) for k in klines]
-    highs = [float(k[2]) for k in klines]
-    lows = [float(k[3]) for k in klines]
-
-    typical_prices = [(highs[i] + lows[i] + closes[i]) / 3 for i in range(len(klines))]
-
-    def ema(values, period):
-        ema_vals = []
-        k = 2 / (period + 1)
-        for i, val in enumerate(values):
-            if i == 0:
-                ema_vals.append(val)
-            else:
-                ema_vals.append(val * k + ema_vals[-1] * (1 - k))
-        return ema_vals
-
-    esa = ema(typical_prices, n1)
-    d = [abs(typical_prices[i] - esa[i]) for i in range(len(esa))]
-    esa_d = ema(d, n1)
-    ci = [(typical_prices[i] - esa[i]) / (0.015 * esa_d[i]) if esa_d[i] != 0 else 0 for i in range(len(esa))]
-
-    wt1 = ema(ci, n2)
-    wt2 = [sum(wt1[max(0, i-3):i+1])/min(i+1, 4) for i in range(len(wt1))]
+    # klines tek KlineBlock; matris için indicators.wavetrend doğrudan kullanılır
+    return wavetrend(klines.high, klines.low, klines.close, n1, n2)
 
-    return wt1, wt2
-
-async def check_symbol_wavetrend_cross(session, symbol, interval):
-    klines = await get_klines(session, symbol, interval, limit=100)
-    if not klines:
-        return None
+def cross_message(symbol, interval, wt1, short, long):
+    # Short sinyal: 0-30 aralığında yukarıdan aşağı kesişim
+    if short:
+        return (symbol, f"Short WaveTrend cross between 0-30: {wt1[-2]:.2f} → {wt1[-1]:.2f}", "bearish", interval)
+    # Long sinyal: 0 ile -30 aralığında aşağıdan yukarı kesişim
+    if long:
+        return (symbol, f"Long WaveTrend cross between 0 and -30: {wt1[-2]:.2f} → {wt1[-1]:.2f}", "bullish", interval)
+    return None
 
+def check_symbol_wavetrend_cross(symbol, interval, klines):
     wt1, wt2 = calculate_wavetrend(klines)
-    if len(wt1) < 3 or len(wt2) < 3:
+    if len(wt1) < 3:
         return None
+    short, long = wavetrend_cross(wt1[-2:], wt2[-2:])
+    return cross_message(symbol, interval, wt1, short[-1], long[-1])
 
-    prev_wt1 = wt1[-2]
-    prev_wt2 = wt2[-2]
-    last_wt1 = wt1[-1]
-    last_wt2 = wt2[-1]
-
-    prev_diff = prev_wt1 - prev_wt2
-    last_diff = last_wt1 - last_wt2
-
-    # Short sinyal: 0-30 aralığında yukarıdan aşağı kesişim
-    if 0 <= prev_wt1 <= 30 and 0 <= prev_wt2 <= 30:
-        if prev_diff > 0 and last_diff < 0:
-            # Filtre: önceki fark 0'ın altında olmamalı
-            if prev_diff < 0:
-                return None
-            return (symbol, f"Short WaveTrend cross between 0-30: {prev_wt1:.2f} → {last_wt1:.2f}", "bearish", interval)
+def check_interval(symbols, interval, candles):
+    # Aynı periyottaki bütün semboller tek matris olarak hesaplanır
+    if not symbols:
+        return []
+    wt1, wt2 = wavetrend(np.vstack([c.high for c in candles]), np.vstack([c.low for c in candles]),
+                         np.vstack([c.close for c in candles]))
+    short, long = wavetrend_cross(wt1[:, -2:], wt2[:, -2:])
+    return [cross_message(symbol, interval, wt1[i], short[i, -1], long[i, -1]) for i, symbol in enumerate(symbols)]
 
-    # Long sinyal: 0 ile -30 aralığında aşağıdan yukarı kesişim
-    if -30 <= prev_wt1 <= 0 and -30 <= prev_wt2 <= 0:
-        if prev_diff < 0 and last_diff > 0:
-            # Filtre: önceki fark 0'ın üstünde olmamalı
-            if prev_diff > 0:
-                return None
-            return (symbol, f"Long WaveTrend cross between 0 and -30: {prev_wt1:.2f} → {last_wt1:.2f}", "bullish", interval)
 
-    return None
+@register("wavetrend", {interval: 100 for interval in intervals}, blacklist=blacklist)
+async def scan(session, symbol, klines):
+    rows = []
+    for interval, candles in klines.items():
+        res = check_symbol_wavetrend_cross(symbol, interval, candles)
+        if res:
+            rows.append((interval, res[1], res[2], 0))
+    return rows
 
 
 async def check_all_symbols():
-    async with aiohttp.ClientSession() as session:
+    async with Transport(headers=headers) as session:
         symbols = await get_high_volume_symbols(session)
 
         print(f"{len(symbols)} sembol günlük hacmi 100M USDT üstünde, kontrol ediliyor...\n")
 
+        # Her sembol için sadece en küçük periyot çekilir, büyük periyotlar ondan türetilir
+        base = base_interval(intervals)
+        limit = base_limit(intervals, 100)
+        bases = await asyncio.gather(*(get_klines(session, symbol, base, limit) for symbol in symbols))
+
         for interval in intervals:
             print(f"\n⏱️ {interval} zaman dilimi kontrol ediliyor...\n")
-            tasks = []
-            for symbol in symbols:
-                tasks.append(check_symbol_wavetrend_cross(session, symbol, interval))
-            results = await asyncio.gather(*tasks)
+            ready, candles = [], []
+            for symbol, klines in zip(symbols, bases):
+                if klines is None:
+                    continue
+                resampled = resample(klines, interval, base)
+                if len(resampled) < 100:
+                    continue
+                ready.append(symbol)
+                candles.append(resampled[-100:])
+            results = check_interval(ready, interval, candles)
 
             filtered = [res for res in results if res]
 
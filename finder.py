@@ -1,19 +1,26 @@
-from helper import Binance
+from asynchelper import SyncBinance
+from account import AccountSnapshot
 from keys import api, secret
-import ta
+from streaming import BarTracker, Bollinger
 import pandas as pd
 from time import sleep
 
-session = Binance(api, secret)
+session = SyncBinance(api, secret)
+account = AccountSnapshot(session)
+# (symbol, period, dev) -> BarTracker; bantlar her kapanan mumda bir kez güncellenir
+bands = {}
 
 
 def bol(symbol, period=20, dev=2):
     kl = session.klines(symbol, '1m')
-    bol_h = ta.volatility.BollingerBands(kl.Close, period, dev).bollinger_hband()
-    bol_l = ta.volatility.BollingerBands(kl.Close, period, dev).bollinger_lband()
-    if kl.Close.iloc[-2] > bol_h.iloc[-2] and kl.Close.iloc[-1] < bol_h.iloc[-1]:
+    tracker = bands.setdefault((symbol, period, dev), BarTracker(lambda: Bollinger(period, dev)))
+    # prev: son kapanan mumun bandı, last: oluşan mum için peek
+    prev, last = tracker.sync(kl.index.values, kl.Close.values)
+    if prev is None or last is None:
+        return None
+    if kl.Close.iloc[-2] > prev.high and kl.Close.iloc[-1] < last.high:
         return 'sell'
-    if kl.Close.iloc[-2] < bol_l.iloc[-2] and kl.Close.iloc[-1] > bol_l.iloc[-1]:
+    if kl.Close.iloc[-2] < prev.low and kl.Close.iloc[-1] > last.low:
         return 'buy'
 
 
@@ -30,11 +37,12 @@ qty = balance * 1
 
 while True:
     try:
-        balance = session.get_balance_usdt()
+        account.refresh()
+        balance = account.get_balance()
+        positions = account.get_positions()
+        orders = account.check_orders()
         qty = balance * leverage * 0.1
         print(f'Balance: {round(balance, 3)} USDT')
-        positions = session.get_positions()
-        orders = session.check_orders()
         print(f'{len(positions)} Positions: {positions}')
 
         sign = bol(symbol, period=20, dev=2)
@@ -44,37 +52,34 @@ while True:
             sleep(1)
 
         if sign is not None and 1 <= len(positions) <= 10:
-            side = session.get_position_side(symbol)
-            sleep(1)
+            side = account.get_position_side(symbol)
             if side == 'BUY' and sign == 'sell':
                 print(symbol, sign)
-                qty = session.get_position_size_usdt(symbol)
-                sleep(1)
+                qty = account.get_position_size_usdt(symbol)
                 session.open_order_market_nostops(symbol, 'sell', qty, leverage, mode)
                 sleep(1)
-                balance = session.get_balance_usdt()
+                balance = account.get_balance()
                 qty = balance * leverage * 0.1
                 session.open_order_market_nostops(symbol, sign, qty, leverage, mode)
             if side == 'BUY' and sign == 'buy':
                 print(symbol, 'one more order:', sign)
                 sleep(1)
-                balance = session.get_balance_usdt()
+                balance = account.get_balance()
                 qty = balance * leverage * 0.1
                 session.open_order_market_nostops(symbol, sign, qty, leverage, mode)
             sleep(1)
             if side == 'SELL' and sign == 'buy':
                 print(symbol, sign)
-                qty = session.get_position_size_usdt(symbol)
-                sleep(1)
+                qty = account.get_position_size_usdt(symbol)
                 session.open_order_market_nostops(symbol, 'buy', qty, leverage, mode)
                 sleep(1)
-                balance = session.get_balance_usdt()
+                balance = account.get_balance()
                 qty = balance * leverage * 0.1
                 session.open_order_market_nostops(symbol, sign, qty, leverage, mode)
             if side == 'SELL' and sign == 'sell':
                 print(symbol, 'one more order:', sign)
                 sleep(1)
-                balance = session.get_balance_usdt()
+                balance = account.get_balance()
                 qty = balance * leverage * 0.1
                 session.open_order_market_nostops(symbol, sign, qty, leverage, mode)
 
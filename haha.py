@@ -1,26 +1,22 @@
-import pandas as pd
 import numpy as np
-import ta
-import time
-from datetime import datetime
 from binance.um_futures import UMFutures
 from binance.error import ClientError
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinedecode import FIELDS
+from klinestore import KlineStore
+from backtester import STOP_LOSS, TAKE_PROFIT, columns, resolve_from_store, simulate
+from resample import interval_ms
 
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+store = KlineStore(client=client)
 
 # Binance API'den veri çekme
 
 def fetch_binance_data(symbol='BTCUSDT', interval='5m', limit=1000):
     try:
-        klines = client.klines(symbol=symbol, interval=interval, limit=limit)
-        df = pd.DataFrame(klines, columns=['open_time', 'open', 'high', 'low', 'close', 'volume', 
-                                            'close_time', 'quote_asset_volume', 'trades', 'taker_buy_base_asset_volume', 
-                                            'taker_buy_quote_asset_volume', 'ignore'])
-        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-        df.set_index('open_time', inplace=True)
-        df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
-        return df
+        return store.frame(symbol, interval, limit, fields=FIELDS,
+                           columns=['open', 'high', 'low', 'close', 'volume', 'quote_asset_volume', 'trades',
+                                    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume'])
     except ClientError as e:
         print(f"Binance API Error: {e}")
         return None
@@ -43,41 +39,42 @@ def macd_hist(df):
     return df
 
 # Backtest fonksiyonu
-def backtest(df, initial_balance=1000, risk=0.01, price_change=0.01):
+def backtest(df, initial_balance=1000, risk=0.01, price_change=0.01, symbol=None, interval=None):
     balance = initial_balance
-    position = 0
-    entry_price = 0
     df = macd_hist(df)
-    
-    for i in range(len(df)):
-        if position == 0:
-            if df['buy_signal'].iloc[i]:
-                entry_price = df['close'].iloc[i]
-                sl = entry_price * (1 - price_change)
-                tp = entry_price * (1 + price_change)
-                position = 1
-                print(f"BUY: {entry_price} | TP: {tp} | SL: {sl}")
-            elif df['sell_signal'].iloc[i]:
-                entry_price = df['close'].iloc[i]
-                sl = entry_price * (1 + price_change)
-                tp = entry_price * (1 - price_change)
-                position = -1
-                print(f"SELL: {entry_price} | TP: {tp} | SL: {sl}")
-        
-        if position != 0:
-            if (position == 1 and df['high'].iloc[i] >= tp) or (position == -1 and df['low'].iloc[i] <= tp):
-                balance += balance * risk
-                position = 0
-                print(f"Take Profit Hit | Balance: {balance}")
-            elif (position == 1 and df['low'].iloc[i] <= sl) or (position == -1 and df['high'].iloc[i] >= sl):
-                balance -= balance * risk
-                position = 0
-                print(f"Stop Loss Hit | Balance: {balance}")
+    high, low, close = columns(df, 'high', 'low', 'close')
+
+    # Giriş mumu da çıkış için kontrol edilir, aynı mumda TP önce sayılır
+    trades = simulate(high, low, close, df['buy_signal'].values, df['sell_signal'].values,
+                      tp=price_change, sl=price_change, same_bar=True, stop_first=False)
+    if symbol is not None and interval is not None:
+        # TP ve SL aynı mumdaysa depodaki 1m mumlarından hangisinin önce geldiğine bakılır
+        open_time = df.index.values.astype('datetime64[ms]').astype(np.int64)
+        trades = resolve_from_store(trades, high, low, open_time, open_time + interval_ms(interval) - 1,
+                                    price_change, price_change, store, symbol)
+
+    for side, entry_price, reason in zip(trades.side, trades.entry_price, trades.reason):
+        if side == 1:
+            sl = entry_price * (1 - price_change)
+            tp = entry_price * (1 + price_change)
+            print(f"BUY: {entry_price} | TP: {tp} | SL: {sl}")
+        else:
+            sl = entry_price * (1 + price_change)
+            tp = entry_price * (1 - price_change)
+            print(f"SELL: {entry_price} | TP: {tp} | SL: {sl}")
+
+        if reason == TAKE_PROFIT:
+            balance += balance * risk
+            print(f"Take Profit Hit | Balance: {balance}")
+        elif reason == STOP_LOSS:
+            balance -= balance * risk
+            print(f"Stop Loss Hit | Balance: {balance}")
     
     print(f"Final Balance: {balance}")
     return balance
 
 # Örnek kullanım
-data = fetch_binance_data('BTCUSDT', '1h', 100)
-if data is not None:
-    backtest(data)
+if __name__ == "__main__":
+    data = fetch_binance_data('BTCUSDT', '1h', 100)
+    if data is not None:
+        backtest(data, symbol='BTCUSDT', interval='1h')
@@ -1,7 +1,18 @@
 from binance.um_futures import UMFutures
-import pandas as pd
 from time import sleep
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from binance.error import ClientError
+from symbolinfo import shared
+from account import SymbolConfig
+from klinedecode import to_frame
+
+
+def to_str(value):
+    # Batch legs are sent as JSON strings; avoid '1e-05' style floats
+    if isinstance(value, float):
+        return format(value, 'f').rstrip('0').rstrip('.')
+    return str(value)
 
 
 class Binance:
@@ -9,6 +20,9 @@ class Binance:
         self.api = api
         self.secret = secret
         self.client = UMFutures(key=api, secret=secret)
+        self.symbols = shared(self.client)
+        self.snapshot = None
+        self.config = SymbolConfig()
 
     def get_balance_usdt(self):
         try:
@@ -22,6 +36,7 @@ class Binance:
     def get_positions(self):
         try:
             resp = self.client.get_position_risk(recvWindow=10000)
+            self.config.seed(resp)
             pos = []
             for elem in resp:
                 if float(elem['positionAmt']) != 0:
@@ -52,6 +67,20 @@ class Binance:
             print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
 
 
+    def fetch_account_state(self):
+        # Raw balances, position risk and open orders, requested concurrently
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            balances = pool.submit(self.client.balance, recvWindow=10000)
+            positions = pool.submit(self.client.get_position_risk, recvWindow=10000)
+            orders = pool.submit(self.client.get_orders, recvWindow=10000)
+            positions = positions.result()
+            self.config.seed(positions)
+            return balances.result(), positions, orders.result()
+
+    def invalidate(self):
+        if self.snapshot is not None:
+            self.snapshot.invalidate()
+
     def check_orders(self):
         try:
             response = self.client.get_orders(recvWindow=10000)
@@ -63,6 +92,7 @@ class Binance:
             print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
 
     def close_open_orders(self, symbol):
+        self.invalidate()
         try:
             response = self.client.cancel_open_orders(symbol=symbol, recvWindow=10000)
             print(response)
@@ -92,43 +122,45 @@ class Binance:
 
     def klines(self, symbol, timeframe, limit=500):
         try:
-            resp = pd.DataFrame(self.client.klines(symbol, timeframe, limit=limit))
-            resp = resp.iloc[:, :6]
-            resp.columns = ['Time', 'Open', 'High', 'Low', 'Close', 'Volume']
-            resp = resp.set_index('Time')
-            resp.index = pd.to_datetime(resp.index, unit='ms')
-            resp = resp.astype(float)
-            return resp
+            return to_frame(self.client.klines(symbol, timeframe, limit=limit),
+                            columns=['Open', 'High', 'Low', 'Close', 'Volume'], index_name='Time')
         except ClientError as error:
             print(
                 f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
 
     def set_leverage(self, symbol, level):
+        if not self.config.needs_leverage(symbol, level):
+            return
         try:
             response = self.client.change_leverage(
                 symbol=symbol, leverage=level, recvWindow=10000
             )
+            self.config.set_leverage(symbol, level)
             print(response)
         except ClientError as error:
             print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
 
     def set_mode(self, symbol, type):
+        if not self.config.needs_mode(symbol, type):
+            return
         try:
             response = self.client.change_margin_type(
                 symbol=symbol, marginType=type, recvWindow=10000
             )
+            self.config.set_mode(symbol, type)
             print(response)
         except ClientError as error:
+            if error.error_code == -4046:
+                # "No need to change margin type": already in the requested mode
+                self.config.set_mode(symbol, type)
+                return
             print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
 
     def get_precisions(self, symbol):
-        try:
-            resp = self.client.exchange_info()['symbols']
-            for elem in resp:
-                if elem['symbol'] == symbol:
-                    return elem['pricePrecision'], elem['quantityPrecision']
-        except ClientError as error:
-            print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+        return self.symbols.precisions(symbol)
+
+    def get_symbol_info(self, symbol):
+        return self.symbols.get(symbol)
 
     def get_commission(self, symbol):
         try:
@@ -137,13 +169,91 @@ class Binance:
         except ClientError as error:
             print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
 
-    def open_order_market(self, symbol, side, volume, leverage, mode, tp, sl):
+    @staticmethod
+    def bracket_legs(symbol, side, qty, price, price_precision, tp, sl):
+        if side == 'buy':
+            entry_side, exit_side = 'BUY', 'SELL'
+            sl_price = round(price - price * sl, price_precision)
+            tp_price = round(price + price * tp, price_precision)
+        else:
+            entry_side, exit_side = 'SELL', 'BUY'
+            sl_price = round(price + price * sl, price_precision)
+            tp_price = round(price - price * tp, price_precision)
+        return [
+            {'symbol': symbol, 'side': entry_side, 'type': 'MARKET', 'quantity': qty},
+            # closePosition legs must not carry a quantity, Binance rejects the pair
+            {'symbol': symbol, 'side': exit_side, 'type': 'STOP_MARKET', 'stopPrice': sl_price,
+             'closePosition': "true", 'workingType': "MARK_PRICE"},
+            {'symbol': symbol, 'side': exit_side, 'type': 'TAKE_PROFIT_MARKET', 'stopPrice': tp_price,
+             'closePosition': "true", 'workingType': "MARK_PRICE"},
+        ]
+
+    @staticmethod
+    def unwind_order(legs):
+        # Reduce-only market order that closes the entry of a bracket
+        return {'symbol': legs[0]['symbol'], 'side': legs[1]['side'], 'type': 'MARKET',
+                'quantity': legs[0]['quantity'], 'reduceOnly': "true"}
+
+    def send_order(self, order):
+        try:
+            return self.client.new_order(**order, recvWindow=10000)
+        except ClientError as error:
+            return {'code': error.error_code, 'msg': error.error_message}
+
+    def send_orders_concurrent(self, orders):
+        with ThreadPoolExecutor(max_workers=len(orders)) as pool:
+            return list(pool.map(self.send_order, orders))
+
+    def send_orders_batch(self, orders):
+        # POST /fapi/v1/batchOrders: max 5 legs, one result (order or error) per leg in the same order
+        try:
+            return self.client.new_batch_order([{k: to_str(v) for k, v in order.items()} for order in orders])
+        except ClientError as error:
+            print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+            return self.send_orders_concurrent(orders)
+
+    def confirm_order(self, symbol, order_id):
+        try:
+            resp = self.client.query_order(symbol=symbol, orderId=order_id, recvWindow=10000)
+            print(f"{symbol} order {order_id}: {resp['status']} {resp.get('executedQty')} @ {resp.get('avgPrice')}")
+        except ClientError as error:
+            print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+
+    def open_bracket(self, legs):
+        # Leg results in order, or None when the entry filled but a protective leg failed twice;
+        # the position is then closed again rather than left without a stop
+        results = self.send_orders_batch(legs)
+        failed = [i for i, resp in enumerate(results) if 'code' in resp]
+        if failed:
+            for i in failed:
+                print(f"{legs[i]['type']} leg failed: {results[i]['code']} {results[i]['msg']}")
+            retry = self.send_orders_concurrent([legs[i] for i in failed])
+            for i, resp in zip(failed, retry):
+                results[i] = resp
+        for leg, resp in zip(legs, results):
+            print(leg['type'], resp)
+        symbol = legs[0]['symbol']
+        if 'code' in results[0]:
+            # No entry, so the protective legs must not stay on the book
+            self.close_open_orders(symbol)
+        elif any('code' in resp for resp in results[1:]):
+            print(f"{symbol} position has no stop/take profit, closing it")
+            self.close_open_orders(symbol)
+            print(self.send_order(self.unwind_order(legs)))
+            return None
+        else:
+            threading.Thread(target=self.confirm_order, args=(symbol, results[0]['orderId']), daemon=True).start()
+        return results
+
+    def open_order_market(self, symbol, side, volume, leverage, mode, tp, sl, bracket=True):
+        self.invalidate()
         self.set_leverage(symbol, leverage)
         self.set_mode(symbol, mode)
         price = float(self.client.ticker_price(symbol)['price'])
-        qty_precision = self.get_precisions(symbol)[1]
-        price_precision = self.get_precisions(symbol)[0]
+        price_precision, qty_precision = self.get_precisions(symbol)
         qty = round(volume / price, qty_precision)
+        if bracket and side in ('buy', 'sell'):
+            return self.open_bracket(self.bracket_legs(symbol, side, qty, price, price_precision, tp, sl))
         if side == 'buy':
             try:
                 resp1 = self.client.new_order(symbol=symbol, side='BUY', type='MARKET', quantity=qty, recvWindow=10000)
@@ -175,11 +285,11 @@ class Binance:
 
 
     def open_order_market_nostops(self, symbol, side, volume, leverage, mode):
+        self.invalidate()
         self.set_leverage(symbol, leverage)
         self.set_mode(symbol, mode)
         price = float(self.client.ticker_price(symbol)['price'])
-        qty_precision = self.get_precisions(symbol)[1]
-        price_precision = self.get_precisions(symbol)[0]
+        price_precision, qty_precision = self.get_precisions(symbol)
         qty = round(volume / price, qty_precision)
         if side == 'buy':
             try:
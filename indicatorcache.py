@@ -0,0 +1,42 @@
+import threading
+from collections import OrderedDict
+
+
+def fingerprint(symbol, interval, block):
+    # Closed candles never change, so block[:-1] is identified by its length and the close time
+    # of its last candle. The forming candle block[-1] is not part of the key: entries cached
+    # under it must be computed from the closed candles only, so they stay valid across refreshes.
+    return symbol, interval, len(block), int(block.close_time[-2]) if len(block) > 1 else None
+
+
+class IndicatorCache:
+    # Indicator results and the intermediates they share (rolling extremes, EMAs, moving
+    # averages) per series fingerprint, evicted least-recently-used past max_entries.
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, name, params, compute):
+        key = key + (name, params)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        value = compute()
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = value
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def view(self, key):
+        # memo(name, params, compute) bound to one series
+        return lambda name, params, compute: self.get(key, name, params, compute)
+
+
+def no_cache(name, params, compute):
+    return compute()
@@ -0,0 +1,273 @@
+import time
+import numpy as np
+
+# Largest exponent a block of ema_filter may reach before a**-k loses headroom in float64
+EXP_BUDGET = 300.0
+
+
+def ema_filter(x, alpha, y0=None):
+    # y[t] = (1 - alpha) * y[t-1] + alpha * x[t] along the last axis, for every row at once.
+    # Inside a block y[k] = a**(k+1) * (y0 + alpha * cumsum(x[j] * a**-(j+1))), so a
+    # whole block is one cumsum; blocks are short enough that a**-k never overflows.
+    x = np.asarray(x, dtype=float)
+    a = 1.0 - alpha
+    y = np.empty_like(x)
+    state = np.zeros(x.shape[:-1]) if y0 is None else np.asarray(y0, dtype=float)
+    if x.shape[-1] == 0:
+        return y
+    if a <= 0:
+        y[...] = x
+        return y
+    size = x.shape[-1] if a == 1 else max(1, min(x.shape[-1], int(EXP_BUDGET / -np.log(a))))
+    powers = a ** np.arange(1, size + 1)
+    for start in range(0, x.shape[-1], size):
+        chunk = x[..., start:start + size]
+        p = powers[:chunk.shape[-1]]
+        y[..., start:start + size] = p * (state[..., None] + alpha * np.cumsum(chunk / p, axis=-1))
+        state = y[..., start + chunk.shape[-1] - 1]
+    return y
+
+
+def ema(x, period):
+    # Classic EMA seeded with the first value, as in the scripts' list-based ema helpers
+    x = np.asarray(x, dtype=float)
+    y = np.empty_like(x)
+    if x.shape[-1]:
+        # y[0] is copied, not computed, so |x - ema| starts at exactly 0 like the loop version
+        y[..., 0] = x[..., 0]
+        y[..., 1:] = ema_filter(x[..., 1:], 2 / (period + 1), x[..., 0])
+    return y
+
+
+def ewm(x, span):
+    # ta's _ema: ewm(span, adjust=False, min_periods=span) over a 1-D series, leading NaNs skipped
+    x = np.asarray(x, dtype=float)
+    out = np.full_like(x, np.nan)
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid):
+        y = ema(x[valid[0]:], span)
+        y[:span - 1] = np.nan
+        out[valid[0]:] = y
+    return out
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    # ta.trend.MACD: (macd, macd_signal)
+    line = ewm(close, fast) - ewm(close, slow)
+    return line, ewm(line, signal)
+
+
+def rolling_mean_partial(x, window):
+    # Mean of the last `window` values, averaging fewer at the start instead of leaving NaN
+    c = np.cumsum(x, axis=-1)
+    total = c.copy()
+    total[..., window:] -= c[..., :-window]
+    return total / np.minimum(np.arange(1, x.shape[-1] + 1), window)
+
+
+def wavetrend(high, low, close, n1=9, n2=12):
+    # WaveTrend oscillator (wt1, wt2) for one series or a (symbols x time) matrix
+    tp = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3
+    esa = ema(tp, n1)
+    esa_d = ema(np.abs(tp - esa), n1)
+    ci = np.divide(tp - esa, 0.015 * esa_d, out=np.zeros_like(tp), where=esa_d != 0)
+    wt1 = ema(ci, n2)
+    return wt1, rolling_mean_partial(wt1, 4)
+
+
+def wavetrend_cross(wt1, wt2, band=30):
+    # Masks over time: True at i when wt1 crossed wt2 between i-1 and i with both lines
+    # inside [0, band] for a bearish cross or [-band, 0] for a bullish one
+    prev1, prev2 = wt1[..., :-1], wt2[..., :-1]
+    prev_diff = prev1 - prev2
+    last_diff = wt1[..., 1:] - wt2[..., 1:]
+    short = (0 <= prev1) & (prev1 <= band) & (0 <= prev2) & (prev2 <= band) & (prev_diff > 0) & (last_diff < 0)
+    long = (-band <= prev1) & (prev1 <= 0) & (-band <= prev2) & (prev2 <= 0) & (prev_diff < 0) & (last_diff > 0)
+    pad = np.zeros(wt1.shape[:-1] + (1,), dtype=bool)
+    return np.concatenate([pad, short], axis=-1), np.concatenate([pad, long], axis=-1)
+
+
+def rolling_max(x, window):
+    # Max of the last `window` values along the last axis (NaN until the window fills), for a
+    # series or a (symbols x time) matrix. Van Herk/Gil-Werman: block-wise prefix and suffix
+    # maxima make every window one np.maximum of two lookups, O(1) per element for any window.
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    if n < window:
+        return out
+    blocks = -(-n // window)
+    padded = np.full(x.shape[:-1] + (blocks * window,), -np.inf)
+    padded[..., :n] = x
+    padded = padded.reshape(x.shape[:-1] + (blocks, window))
+    prefix = np.maximum.accumulate(padded, axis=-1).reshape(x.shape[:-1] + (-1,))
+    suffix = np.maximum.accumulate(padded[..., ::-1], axis=-1)[..., ::-1].reshape(x.shape[:-1] + (-1,))
+    out[..., window - 1:] = np.maximum(suffix[..., :n - window + 1], prefix[..., window - 1:n])
+    return out
+
+
+def rolling_min(x, window):
+    return -rolling_max(-np.asarray(x, dtype=float), window)
+
+
+def highest_age(high, window):
+    # Bars since the latest bar that made the `window` high (0 = last bar), per row
+    return np.argmax(np.asarray(high)[..., :-window - 1:-1], axis=-1)
+
+
+def bollinger(close, period=20, dev=2):
+    # ta.volatility.BollingerBands (population std): (mid, high, low), NaN until the window fills
+    close = np.asarray(close, dtype=float)
+    mid, high, low = (np.full(close.shape, np.nan) for _ in range(3))
+    if close.shape[-1] >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(close, period, axis=-1)
+        mid[..., period - 1:] = windows.mean(axis=-1)
+        std = windows.std(axis=-1)
+        high[..., period - 1:] = mid[..., period - 1:] + dev * std
+        low[..., period - 1:] = mid[..., period - 1:] - dev * std
+    return mid, high, low
+
+
+def rsi_from_averages(up, down):
+    # rs = 0 when there are no losses, as in the original loop implementations
+    rs = np.divide(up, down, out=np.zeros_like(up), where=down != 0)
+    return 100. - 100. / (1. + rs)
+
+
+def wilder_rsi(closes, period=14, head=None, state=False):
+    # closes: (symbols x time) or 1-D. The first `period` deltas seed the averages and
+    # Wilder smoothing runs from delta period-1 on, exactly like the per-symbol loops.
+    # head=None fills the first `period` values with the seed RSI (alla2.compute_rsi),
+    # a number fills them with that value (alllaaa.calculate_rsi uses 50).
+    closes = np.asarray(closes, dtype=float)
+    flat = closes.ndim == 1
+    closes = np.atleast_2d(closes)
+    deltas = np.diff(closes, axis=1)
+    gains = np.maximum(deltas, 0.)
+    losses = np.maximum(-deltas, 0.)
+    up0 = gains[:, :period].sum(axis=1) / period
+    down0 = losses[:, :period].sum(axis=1) / period
+    up = ema_filter(gains[:, period - 1:], 1. / period, up0)
+    down = ema_filter(losses[:, period - 1:], 1. / period, down0)
+    rsi = np.empty_like(closes)
+    if head is None:
+        rsi[:, :period] = rsi_from_averages(up0, down0)[:, None]
+    else:
+        rsi[:, :period] = head
+    rsi[:, period:] = rsi_from_averages(up, down)
+    if state:
+        last_up = up[:, -1] if up.shape[1] else up0
+        last_down = down[:, -1] if down.shape[1] else down0
+        return (rsi[0] if flat else rsi), (last_up, last_down, closes[:, -1].copy())
+    return rsi[0] if flat else rsi
+
+
+def last_rsi(series, period=14, head=None):
+    # Latest RSI of many series of any length; equal-length series share one matrix pass
+    out = np.full(len(series), np.nan)
+    groups = {}
+    for i, s in enumerate(series):
+        groups.setdefault(len(s), []).append(i)
+    for index in groups.values():
+        out[index] = wilder_rsi(np.vstack([series[i] for i in index]), period, head)[:, -1]
+    return out
+
+
+class WilderRSI:
+    # Universe-wide RSI: fit() on a (symbols x time) matrix, then update() with one new close per symbol
+    def __init__(self, period=14, head=None):
+        self.period = period
+        self.head = head
+        self.up = self.down = self.last = None
+
+    def fit(self, closes):
+        rsi, (self.up, self.down, self.last) = wilder_rsi(closes, self.period, self.head, state=True)
+        return rsi
+
+    def update(self, closes):
+        closes = np.atleast_1d(np.asarray(closes, dtype=float))
+        delta = closes - self.last
+        p = self.period
+        self.up = (self.up * (p - 1) + np.maximum(delta, 0.)) / p
+        self.down = (self.down * (p - 1) + np.maximum(-delta, 0.)) / p
+        self.last = closes
+        return rsi_from_averages(self.up, self.down)
+
+
+if __name__ == "__main__":
+    # Speed against the per-symbol loops from alllaaa.calculate_rsi / alla2.compute_rsi;
+    # parity with ta's RSIIndicator is asserted in test_indicators.py
+    def loop_rsi(prices, period=14, head=None):
+        deltas = np.diff(prices)
+        seed = deltas[:period]
+        up = seed[seed >= 0].sum() / period
+        down = -seed[seed < 0].sum() / period
+        rs = up / down if down != 0 else 0
+        rsi = np.zeros_like(prices)
+        rsi[:period] = 100. - 100. / (1. + rs) if head is None else head
+        for i in range(period, len(prices)):
+            delta = deltas[i - 1]
+            upval, downval = (delta, 0.) if delta > 0 else (0., -delta)
+            up = (up * (period - 1) + upval) / period
+            down = (down * (period - 1) + downval) / period
+            rs = up / down if down != 0 else 0
+            rsi[i] = 100. - 100. / (1. + rs)
+        return rsi
+
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.standard_normal((300, 1500)) * 0.01, axis=1))
+
+    start = time.perf_counter()
+    expected = np.array([loop_rsi(row) for row in closes])
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = wilder_rsi(closes)
+    vector_time = time.perf_counter() - start
+    print(f"300 x 1500 loop: {loop_time * 1e3:.1f} ms, vectorized: {vector_time * 1e3:.1f} ms "
+          f"({loop_time / vector_time:.0f}x), max abs diff {np.abs(result - expected).max():.2e}")
+
+    # Rolling extremes against pandas (lala's Donchian/Kijun) and the per-symbol max scans
+    import pandas as pd
+    highs = closes + 0.5
+    start = time.perf_counter()
+    expected = np.array([pd.Series(row).rolling(26).max().values for row in highs])
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = rolling_max(highs, 26)
+    vector_time = time.perf_counter() - start
+    print(f"rolling max 300 x 1500 pandas per symbol: {loop_time * 1e3:.1f} ms, matrix: {vector_time * 1e3:.1f} ms, "
+          f"same: {np.allclose(result, expected, equal_nan=True)}")
+    print("highest_age parity:", ((highest_age(highs, 100) >= 6) == np.array([r[-6:].max() < r[-100:].max() for r in highs])).all())
+
+    # WaveTrend against the list version from cumulative.calculate_wavetrend
+    def loop_wavetrend(highs, lows, closes, n1=9, n2=12):
+        typical_prices = [(highs[i] + lows[i] + closes[i]) / 3 for i in range(len(closes))]
+
+        def loop_ema(values, period):
+            ema_vals = []
+            k = 2 / (period + 1)
+            for i, val in enumerate(values):
+                ema_vals.append(val if i == 0 else val * k + ema_vals[-1] * (1 - k))
+            return ema_vals
+
+        esa = loop_ema(typical_prices, n1)
+        d = [abs(typical_prices[i] - esa[i]) for i in range(len(esa))]
+        esa_d = loop_ema(d, n1)
+        ci = [(typical_prices[i] - esa[i]) / (0.015 * esa_d[i]) if esa_d[i] != 0 else 0 for i in range(len(esa))]
+        wt1 = loop_ema(ci, n2)
+        wt2 = [sum(wt1[max(0, i-3):i+1])/min(i+1, 4) for i in range(len(wt1))]
+        return wt1, wt2
+
+    spread = np.abs(rng.standard_normal(closes.shape)) * 0.5
+    highs, lows = closes + spread, closes - spread
+    rows = closes[:, -100:], highs[:, -100:], lows[:, -100:]
+    start = time.perf_counter()
+    expected = [loop_wavetrend(h.tolist(), l.tolist(), c.tolist()) for c, h, l in zip(*rows)]
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    wt1, wt2 = wavetrend(rows[1], rows[2], rows[0])
+    short, long = wavetrend_cross(wt1, wt2)
+    vector_time = time.perf_counter() - start
+    diff = max(np.abs(wt1 - np.array([e[0] for e in expected])).max(), np.abs(wt2 - np.array([e[1] for e in expected])).max())
+    print(f"WaveTrend 300 x 100 loop: {loop_time * 1e3:.1f} ms, vectorized + cross mask: {vector_time * 1e3:.2f} ms, "
+          f"max abs diff {diff:.2e}, crosses {int(short.sum())} short / {int(long.sum())} long")
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from binance.um_futures import UMFutures
+from klinedecode import concat, decode
+from klinestore import PAGE_LIMIT, KlineStore, closed_only
+from resample import interval_ms
+
+KLINES = "/fapi/v1/klines"
+
+
+def block_bytes(block):
+    return block.time.nbytes + block.close_time.nbytes + block.values.nbytes
+
+
+class KlineCache:
+    # Closed candles never change: they are kept in memory (LRU, capped at max_bytes)
+    # and on disk through KlineStore. A request only downloads what closed since the
+    # last call plus the forming candle, via startTime. store=False keeps it memory-only.
+    def __init__(self, client=None, store=None, max_bytes=64 * 1024 * 1024, keep=PAGE_LIMIT):
+        self.store = KlineStore(client=client) if store is None else store or None
+        self.client = client or (self.store.client if self.store else UMFutures())
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def closed(self, symbol, interval):
+        key = (symbol, interval)
+        with self.lock:
+            block = self.entries.get(key)
+            if block is not None:
+                self.entries.move_to_end(key)
+                return block
+        if self.store is None:
+            return None
+        block = self.store.read(symbol, interval, limit=self.keep)
+        return block if len(block) else None
+
+    def put(self, symbol, interval, block):
+        block = block[-self.keep:]
+        key = (symbol, interval)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= block_bytes(old)
+            self.entries[key] = block
+            self.bytes += block_bytes(block)
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= block_bytes(evicted)
+
+    def request(self, symbol, interval, limit):
+        # Query parameters for the missing part, or a full download when the cache cannot cover `limit`
+        closed = self.closed(symbol, interval)
+        params = {'symbol': symbol, 'interval': interval}
+        if closed is not None and len(closed) >= min(limit, self.keep) - 1:
+            last = int(closed.close_time[-1])
+            missing = (int(time.time() * 1000) - last) // interval_ms(interval) + 2
+            if missing <= PAGE_LIMIT:
+                params.update(startTime=last + 1, limit=missing)
+                return closed, params
+        params['limit'] = min(limit, PAGE_LIMIT)
+        return None, params
+
+    def persist(self, symbol, interval, block):
+        # Only extends the disk series where it stays contiguous
+        if self.store is None or len(block) == 0:
+            return
+        last = self.store.last_close_time(symbol, interval)
+        if last is None or block.time[0] <= last + 1:
+            self.store.append(symbol, interval, block)
+        first = self.store.first_open_time(symbol, interval)
+        if first is not None and block.close_time[-1] >= first - 1:
+            self.store.prepend(symbol, interval, block)
+
+    def merge(self, symbol, interval, limit, closed, page):
+        # page: everything after `closed`, or a full download when closed is None
+        done = closed_only(page)
+        self.persist(symbol, interval, done)
+        if closed is None:
+            self.put(symbol, interval, done)
+            return page[-limit:]
+        if len(done):
+            closed = concat([closed, done])
+        self.put(symbol, interval, closed)
+        return concat([closed[-limit:], page[len(done):]])[-limit:]
+
+    def get(self, symbol, interval, limit=500):
+        closed, params = self.request(symbol, interval, limit)
+        page = decode(self.client.klines(**params))
+        return self.merge(symbol, interval, limit, closed, page)
+
+    async def get_async(self, session, symbol, interval, limit=500):
+        # session: transport.Transport
+        closed, params = self.request(symbol, interval, limit)
+        payload = await session.get(KLINES, params, raw=True)
+        if payload is None:
+            return None
+        return self.merge(symbol, interval, limit, closed, decode(payload))
+
+
+_shared = {}
+
+
+def shared(client=None, max_bytes=64 * 1024 * 1024):
+    # One cache per process; scripts pass their own client the first time
+    if 'cache' not in _shared:
+        _shared['cache'] = KlineCache(client, max_bytes=max_bytes)
+    return _shared['cache']
@@ -0,0 +1,173 @@
+import os
+import time
+import numpy as np
+from binance.um_futures import UMFutures
+from klinedecode import FIELDS, OHLCV, KlineBlock, concat, decode
+
+STORE_ROOT = "klines"
+PAGE_LIMIT = 1500
+# One raw little-endian file per column: klines/<SYMBOL>/<interval>/<column>.bin
+COLUMNS = {'open_time': np.dtype('<i8'), 'close_time': np.dtype('<i8')}
+COLUMNS.update({name: np.dtype('<f8') for name in FIELDS})
+
+
+def empty_block():
+    return KlineBlock(np.empty(0, np.int64), np.empty(0, np.int64), np.empty((len(FIELDS), 0)))
+
+
+def closed_only(block, now_ms=None):
+    # The still-forming candle changes until close_time, so it never goes to disk
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return block[:int(np.searchsorted(block.close_time, now_ms))]
+
+
+class KlineStore:
+    def __init__(self, root=STORE_ROOT, client=None):
+        self.root = root
+        self.client = client or UMFutures()
+        # (symbol, interval) -> forming candle of the last fetched page, kept in memory only
+        self.forming = {}
+
+    def path(self, symbol, interval, column=None):
+        folder = os.path.join(self.root, symbol, interval)
+        if column is None:
+            return folder
+        return os.path.join(folder, f"{column}.bin")
+
+    def length(self, symbol, interval):
+        # A write interrupted between columns leaves them uneven; the shortest one wins
+        sizes = []
+        for column, dtype in COLUMNS.items():
+            path = self.path(symbol, interval, column)
+            sizes.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def column(self, symbol, interval, name):
+        # Zero-copy memory-mapped view of one column
+        n = self.length(symbol, interval)
+        if n == 0:
+            return np.empty(0, COLUMNS[name])
+        return np.memmap(self.path(symbol, interval, name), dtype=COLUMNS[name], mode='r', shape=(n,))
+
+    def first_open_time(self, symbol, interval):
+        times = self.column(symbol, interval, 'open_time')
+        return int(times[0]) if len(times) else None
+
+    def last_close_time(self, symbol, interval):
+        times = self.column(symbol, interval, 'close_time')
+        return int(times[-1]) if len(times) else None
+
+    def read(self, symbol, interval, start=None, end=None, limit=None):
+        # start/end are open_time bounds in ms; only the touched pages of each column are read
+        n = self.length(symbol, interval)
+        if n == 0:
+            return empty_block()
+        times = self.column(symbol, interval, 'open_time')
+        lo = 0 if start is None else int(np.searchsorted(times, start))
+        hi = n if end is None else int(np.searchsorted(times, end, side='right'))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        values = np.vstack([self.column(symbol, interval, name)[lo:hi] for name in FIELDS])
+        return KlineBlock(np.array(times[lo:hi]), np.array(self.column(symbol, interval, 'close_time')[lo:hi]), values)
+
+    def columns_of(self, block):
+        data = {'open_time': block.time, 'close_time': block.close_time}
+        data.update({name: block.values[i] for i, name in enumerate(FIELDS)})
+        return data
+
+    def append(self, symbol, interval, block):
+        last = self.last_close_time(symbol, interval)
+        if last is not None:
+            block = block[int(np.searchsorted(block.time, last, side='right')):]
+        if len(block) == 0:
+            return 0
+        n = self.length(symbol, interval)
+        os.makedirs(self.path(symbol, interval), exist_ok=True)
+        for column, values in self.columns_of(block).items():
+            path = self.path(symbol, interval, column)
+            if os.path.exists(path) and os.path.getsize(path) != n * COLUMNS[column].itemsize:
+                with open(path, 'r+b') as file:
+                    file.truncate(n * COLUMNS[column].itemsize)
+            with open(path, 'ab') as file:
+                np.ascontiguousarray(values, dtype=COLUMNS[column]).tofile(file)
+        return len(block)
+
+    def prepend(self, symbol, interval, block):
+        first = self.first_open_time(symbol, interval)
+        if first is not None:
+            block = block[:int(np.searchsorted(block.time, first))]
+        if len(block) == 0:
+            return 0
+        n = self.length(symbol, interval)
+        os.makedirs(self.path(symbol, interval), exist_ok=True)
+        for column, values in self.columns_of(block).items():
+            path = self.path(symbol, interval, column)
+            old = np.fromfile(path, dtype=COLUMNS[column], count=n) if n else np.empty(0, COLUMNS[column])
+            np.concatenate([values.astype(COLUMNS[column]), old]).tofile(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return len(block)
+
+    def fetch(self, symbol, interval, **params):
+        return decode(self.client.klines(symbol=symbol, interval=interval, limit=PAGE_LIMIT, **params))
+
+    def split(self, symbol, interval, page):
+        closed = closed_only(page)
+        self.forming[(symbol, interval)] = page[len(closed):]
+        return closed
+
+    def update(self, symbol, interval):
+        # Only candles newer than the last stored close time go over the network
+        last = self.last_close_time(symbol, interval)
+        if last is None:
+            return self.backfill(symbol, interval, PAGE_LIMIT)
+        added = 0
+        while True:
+            page = self.fetch(symbol, interval, startTime=last + 1)
+            added += self.append(symbol, interval, self.split(symbol, interval, page))
+            if len(page) < PAGE_LIMIT:
+                return added
+            last = int(page.close_time[-1])
+
+    def backfill(self, symbol, interval, bars=None, since=None):
+        # Walk backwards from the oldest stored candle until `bars` are stored or `since` (ms) is reached
+        pages = []
+        end = self.first_open_time(symbol, interval)
+        have = self.length(symbol, interval)
+        while (bars is not None and have < bars) or (since is not None and (end is None or end > since)):
+            params = {} if end is None else {'endTime': end - 1}
+            page = self.fetch(symbol, interval, **params)
+            full = len(page) == PAGE_LIMIT
+            if end is None:
+                page = self.split(symbol, interval, page)
+            if len(page) == 0:
+                break
+            pages.append(page)
+            have += len(page)
+            end = int(page.time[0])
+            if not full:
+                # Reached the listing date
+                break
+        if not pages:
+            return 0
+        pages.reverse()
+        block = concat(pages)
+        if self.length(symbol, interval) == 0:
+            return self.append(symbol, interval, block)
+        return self.prepend(symbol, interval, block)
+
+    def load(self, symbol, interval, limit=1000, refresh=True, forming=True):
+        # Like the klines endpoint: the last `limit` candles, the still-forming one last
+        # (forming=False, or refresh=False: closed candles only)
+        if not refresh:
+            return self.read(symbol, interval, limit=limit)
+        self.update(symbol, interval)
+        if self.length(symbol, interval) < limit:
+            self.backfill(symbol, interval, limit)
+        tail = self.forming.get((symbol, interval)) if forming else None
+        if tail is None or len(tail) == 0 or limit < 1:
+            return self.read(symbol, interval, limit=limit)
+        return concat([self.read(symbol, interval, limit=limit - len(tail)), tail])
+
+    def frame(self, symbol, interval, limit=1000, fields=OHLCV, columns=None, index_name='open_time', refresh=True,
+              forming=True):
+        return self.load(symbol, interval, limit, refresh, forming).to_frame(fields, columns, index_name)
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+import numpy as np
+import aiohttp
+from klinedecode import FIELDS, KlineBlock, concat, decode
+
+STREAM_URL = "wss://fstream.binance.com/stream"
+REST_URL = "https://fapi.binance.com/fapi/v1/klines"
+STREAMS_PER_CONNECTION = 200
+PAGE_LIMIT = 1500
+# kline event keys in FIELDS order
+EVENT_KEYS = ('o', 'h', 'l', 'c', 'v', 'q', 'n', 'V', 'Q')
+
+
+class RingBuffer:
+    # Last `size` candles of one (symbol, interval). Every row is written twice,
+    # at i and i + size, so the newest `size` rows are always one contiguous slice.
+    def __init__(self, size=500):
+        self.size = size
+        self.time = np.zeros(2 * size, np.int64)
+        self.close_time = np.zeros(2 * size, np.int64)
+        self.values = np.zeros((len(FIELDS), 2 * size))
+        self.count = 0
+        self.head = 0  # slot of the newest candle
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def write(self, slot, open_time, close_time, values):
+        for i in (slot, slot + self.size):
+            self.time[i] = open_time
+            self.close_time[i] = close_time
+            self.values[:, i] = values
+
+    def push(self, open_time, close_time, values):
+        # Same open time updates the forming candle in place, a newer one appends
+        if self.count and open_time == self.time[self.head]:
+            self.write(self.head, open_time, close_time, values)
+        elif not self.count or open_time > self.time[self.head]:
+            self.head = (self.head + 1) % self.size if self.count else 0
+            self.count += 1
+            self.write(self.head, open_time, close_time, values)
+
+    def extend(self, block):
+        for i in range(max(0, len(block) - self.size), len(block)):
+            self.push(int(block.time[i]), int(block.close_time[i]), block.values[:, i])
+
+    def view(self, limit=None):
+        n = len(self)
+        if limit is not None:
+            n = min(n, limit)
+        end = self.head + 1 if self.head + 1 >= n else self.head + 1 + self.size
+        return KlineBlock(self.time[end - n:end], self.close_time[end - n:end], self.values[:, end - n:end])
+
+
+class KlineStream:
+    # Rings of the last `size` candles per (symbol, interval), seeded over REST and kept current
+    # by the kline websocket. `size` may exceed one REST page; the seed is paged backwards.
+    def __init__(self, size=500, url=STREAM_URL, rest_url=REST_URL):
+        self.size = size
+        self.url = url
+        self.rest_url = rest_url
+        self.buffers = {}
+        self.tasks = []
+        self.session = None
+
+    def buffer(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self.buffers:
+            self.buffers[key] = RingBuffer(self.size)
+        return self.buffers[key]
+
+    def seed(self, symbol, interval, block):
+        # A fresh ring replaces the old one, so candles missed while disconnected leave no gap
+        ring = RingBuffer(self.size)
+        ring.extend(block)
+        self.buffers[(symbol, interval)] = ring
+
+    def klines(self, symbol, interval, limit, now_ms=None):
+        # None when the ring holds fewer than `limit` candles or its newest candle has already
+        # closed, i.e. opened more than one interval ago (stream down or not seeded yet), so
+        # callers fall back to REST
+        buf = self.buffers.get((symbol, interval))
+        if buf is None or len(buf) < limit:
+            return None
+        block = buf.view(limit)
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        if now_ms > int(block.close_time[-1]):
+            return None
+        return block
+
+    def on_message(self, message):
+        data = json.loads(message)
+        event = data.get('data', data)
+        if event.get('e') != 'kline':
+            return
+        k = event['k']
+        values = [float(k[key]) for key in EVENT_KEYS]
+        self.buffer(event['s'], k['i']).push(int(k['t']), int(k['T']), values)
+
+    async def fetch_seed(self, symbol, interval):
+        pages = []
+        remaining = self.size
+        end_time = None
+        try:
+            while remaining > 0:
+                params = {'symbol': symbol, 'interval': interval, 'limit': min(remaining, PAGE_LIMIT)}
+                if end_time is not None:
+                    params['endTime'] = end_time
+                async with self.session.get(self.rest_url, params=params) as resp:
+                    page = decode(await resp.read())
+                if len(page) == 0:
+                    break
+                pages.append(page)
+                remaining -= len(page)
+                if len(page) < params['limit']:
+                    break
+                end_time = int(page.time[0]) - 1
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Seed error {symbol} {interval}: {e}")
+            self.buffers.pop((symbol, interval), None)
+            return
+        if pages:
+            self.seed(symbol, interval, concat(reversed(pages)))
+
+    async def consume(self, pairs, seed=True):
+        # Every (re)connect reseeds this connection's rings; events sent meanwhile wait in the
+        # socket and are applied on top of the seed
+        streams = '/'.join(f"{s.lower()}@kline_{i}" for s, i in pairs)
+        delay = 1
+        while True:
+            try:
+                async with self.session.ws_connect(f"{self.url}?streams={streams}", heartbeat=30) as ws:
+                    delay = 1
+                    if seed:
+                        await asyncio.gather(*(self.fetch_seed(s, i) for s, i in pairs))
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self.on_message(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Stream error: {e}")
+            if seed:
+                # Nothing updates these rings until the reconnect reseeds them
+                for pair in pairs:
+                    self.buffers.pop(pair, None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    async def start(self, symbols, intervals, seed=True):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_read=90))
+        pairs = [(s, i) for s in symbols for i in intervals]
+        for n in range(0, len(pairs), STREAMS_PER_CONNECTION):
+            self.tasks.append(asyncio.create_task(self.consume(pairs[n:n + STREAMS_PER_CONNECTION], seed)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
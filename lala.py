@@ -1,77 +1,114 @@
+import numpy as np
 import pandas as pd
 from ta import trend, momentum, volatility, volume
 from binance.um_futures import UMFutures
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinecache import KlineCache
+from indicatorcache import IndicatorCache, fingerprint, no_cache
+from indicators import rolling_max, rolling_min
 from rich.console import Console
 from rich.table import Table
 from rich.columns import Columns
 
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+cache = KlineCache(client)
+indicator_cache = IndicatorCache()
 
 def get_ohlcv(symbol, interval, limit=200):
-    klines = client.klines(symbol=symbol, interval=interval, limit=limit)
-    df = pd.DataFrame(klines, columns=[
-        'timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time',
-        'quote_asset_volume', 'num_trades', 'taker_base_volume',
-        'taker_quote_volume', 'ignore'
-    ])
-    df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].astype(float)
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-    return df
-
-def compute_indicators(df):
-    results = {}
-    close = df['close']
-    high = df['high']
-    low = df['low']
-    volume_ = df['volume']
-
-    results['SMA20'] = close.iloc[-1] > close.rolling(20).mean().iloc[-1]
-    results['EMA20'] = close.iloc[-1] > close.ewm(span=20).mean().iloc[-1]
-
-    macd = trend.MACD(close)
-    results['MACD'] = macd.macd_diff().iloc[-1] > 0
+    return cache.get(symbol, interval, limit).to_frame(index_name='timestamp').reset_index()
 
+def stc_signal(close):
     try:
-        st = trend.stc(close)
-        results['STC'] = st.iloc[-1] > 50
+        return trend.stc(close).iloc[-1] > 50
     except:
-        results['STC'] = False
-
-    results['RSI'] = momentum.RSIIndicator(close).rsi().iloc[-1] > 50
-    results['Stochastic'] = momentum.StochasticOscillator(high, low, close).stoch().iloc[-1] > 50
-    results['CCI'] = trend.CCIIndicator(high, low, close).cci().iloc[-1] > 0
-    results['WilliamsR'] = momentum.WilliamsRIndicator(high, low, close).williams_r().iloc[-1] > -50
-
-    bb = volatility.BollingerBands(close)
-    results['Bollinger %B'] = bb.bollinger_pband().iloc[-1] > 0.5
-
-    atr = volatility.AverageTrueRange(high, low, close).average_true_range()
-    std_dev = close.pct_change().rolling(14).std()
-    results['ATR'] = atr.iloc[-1] > std_dev.iloc[-1]
-
-    dc = volatility.DonchianChannel(high, low, close)
-    mid = (dc.donchian_channel_hband() + dc.donchian_channel_lband()) / 2
-    results['Donchian'] = close.iloc[-1] > mid.iloc[-1]
+        return False
 
-    obv = volume.OnBalanceVolumeIndicator(close, volume_).on_balance_volume()
-
-    # OBV'nin 50 periyotluk EMA'sını hesapla
-    obv_ema_50 = obv.ewm(span=50).mean()
-
-    # OBV'nin son değeri ile 50 EMA'nın son değerini karşılaştır
-    results['OBV'] = obv.iloc[-1] > obv_ema_50.iloc[-1]
-    results['MFI'] = volume.MFIIndicator(high, low, close, volume_).money_flow_index().iloc[-1] > 50
-
-    kijun = high.rolling(26).max().add(low.rolling(26).min()).div(2)
-    results['KijunSen'] = close.iloc[-1] > kijun.iloc[-1]
-
-    results['ROC'] = momentum.ROCIndicator(close).roc().iloc[-1] > 0
-    results['ParabolicSAR'] = trend.PSARIndicator(high, low, close).psar().iloc[-1] < close.iloc[-1]
-    results['TSI'] = momentum.TSIIndicator(close).tsi().iloc[-1] > 0
-    results['ADX'] = trend.ADXIndicator(high, low, close).adx().iloc[-1] > 20
-
-    return results
+def compute_indicators(df, memo=no_cache):
+    # memo(name, params, compute): IndicatorCache.view() of the closed candles (df[:-1]); ortak ara
+    # seriler (kanal uçları, EMA'lar, 20'lik ortalama) kapanmış mumlar için bir kez hesaplanır,
+    # oluşan son mumun değeri her çağrıda sona eklenir
+    close = df['close']
+    high = df['high']
+    low = df['low']
+    volume_ = df['volume']
+    closed = close.iloc[:-1]
+
+    def extend(name, window, head, last):
+        values = memo(name, window, head)
+        tail = last(values) if len(close) >= window else np.nan
+        return pd.Series(np.append(values, tail), index=close.index)
+
+    def highest(window):
+        return extend('highest', window, lambda: rolling_max(high.values[:-1], window),
+                      lambda _: high.values[-window:].max())
+
+    def lowest(window):
+        return extend('lowest', window, lambda: rolling_min(low.values[:-1], window),
+                      lambda _: low.values[-window:].min())
+
+    def ema(window):
+        # ta'nın _ema'sı: adjust=False, min_periods=window; özyineleme ilk mumdan başlar
+        alpha = 2 / (window + 1)
+        series = extend('ema', window, lambda: closed.ewm(span=window, adjust=False).mean().values,
+                        lambda head: (1 - alpha) * head[-1] + alpha * close.values[-1])
+        series.iloc[:window - 1] = np.nan
+        return series
+
+    def sma(window):
+        return extend('sma', window, lambda: closed.rolling(window, min_periods=window).mean().values,
+                      lambda _: close.values[-window:].mean())
+
+    def macd_diff():
+        macd = ema(12) - ema(26)
+        return macd - macd.ewm(span=9, min_periods=9, adjust=False).mean()
+
+    def stochastic():
+        return 100 * (close - lowest(14)) / (highest(14) - lowest(14))
+
+    def williams_r():
+        return -100 * (highest(14) - close) / (highest(14) - lowest(14))
+
+    def percent_b():
+        std = extend('std', 20, lambda: closed.rolling(20, min_periods=20).std(ddof=0).values,
+                     lambda _: close.values[-20:].std())
+        lband = sma(20) - 2 * std
+        return (close - lband) / (4 * std)
+
+    def atr_vs_std():
+        atr = volatility.AverageTrueRange(high, low, close).average_true_range()
+        std_dev = close.pct_change().rolling(14).std()
+        return atr.iloc[-1] > std_dev.iloc[-1]
+
+    def obv_signal():
+        obv = volume.OnBalanceVolumeIndicator(close, volume_).on_balance_volume()
+
+        # OBV'nin 50 periyotluk EMA'sını hesapla
+        obv_ema_50 = obv.ewm(span=50).mean()
+
+        # OBV'nin son değeri ile 50 EMA'nın son değerini karşılaştır
+        return obv.iloc[-1] > obv_ema_50.iloc[-1]
+
+    signals = {
+        'SMA20': lambda: close.iloc[-1] > sma(20).iloc[-1],
+        'EMA20': lambda: close.iloc[-1] > close.ewm(span=20).mean().iloc[-1],
+        'MACD': lambda: macd_diff().iloc[-1] > 0,
+        'STC': lambda: stc_signal(close),
+        'RSI': lambda: momentum.RSIIndicator(close).rsi().iloc[-1] > 50,
+        'Stochastic': lambda: stochastic().iloc[-1] > 50,
+        'CCI': lambda: trend.CCIIndicator(high, low, close).cci().iloc[-1] > 0,
+        'WilliamsR': lambda: williams_r().iloc[-1] > -50,
+        'Bollinger %B': lambda: percent_b().iloc[-1] > 0.5,
+        'ATR': atr_vs_std,
+        'Donchian': lambda: close.iloc[-1] > ((highest(20) + lowest(20)) / 2).iloc[-1],
+        'OBV': obv_signal,
+        'MFI': lambda: volume.MFIIndicator(high, low, close, volume_).money_flow_index().iloc[-1] > 50,
+        'KijunSen': lambda: close.iloc[-1] > highest(26).add(lowest(26)).div(2).iloc[-1],
+        'ROC': lambda: momentum.ROCIndicator(close).roc().iloc[-1] > 0,
+        'ParabolicSAR': lambda: trend.PSARIndicator(high, low, close).psar().iloc[-1] < close.iloc[-1],
+        'TSI': lambda: momentum.TSIIndicator(close).tsi().iloc[-1] > 0,
+        'ADX': lambda: trend.ADXIndicator(high, low, close).adx().iloc[-1] > 20,
+    }
+    return {name: compute() for name, compute in signals.items()}
 
 def create_table(results, tf):
     table = Table(title=f"[bold yellow]{tf}[/bold yellow]", expand=True)
@@ -94,8 +131,10 @@ def analyze_multiple(symbol, timeframes):
 
     for tf in timeframes:
         try:
-            df = get_ohlcv(symbol, tf)
-            results = compute_indicators(df)
+            # Kapanmış mumlardan hesaplanan ara seriler yeni mum kapanana kadar önbellekten gelir
+            block = cache.get(symbol, tf, 200)
+            df = block.to_frame(index_name='timestamp').reset_index()
+            results = compute_indicators(df, indicator_cache.view(fingerprint(symbol, tf, block)))
             table = create_table(results, tf)
             tables.append(table)
         except Exception as e:
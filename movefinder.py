@@ -1,51 +1,60 @@
 import asyncio
-import aiohttp
-import numpy as np
+import sys
 from colorama import Fore, Style
 from xconfig import BINANCE_API_KEY
+from klinedecode import decode
+from klinestream import KlineStream
+from transport import Transport
+from universe import shared
+from scan import register
 
 # Windows uyumu
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 BASE_URL = "https://fapi.binance.com"
+universe = shared(BASE_URL)
 interval = "15m"
 headers = {"X-MBX-APIKEY": BINANCE_API_KEY}
 blacklist = ["TRXUSDT", "BTCUSDT"]
 
-async def fetch(session, url, params=None):
-    try:
-        async with session.get(url, params=params, headers=headers, timeout=10) as response:
-            return await response.json()
-    except Exception as e:
-        print(f"Fetch error: {e}")
-        return None
+# --watch ile KlineStream; açıkken mumlar bellekten okunur, hazır/güncel değilse REST'ten
+stream = None
+watch_every = 60  # saniye
 
 async def get_high_volume_symbols(session, min_volume=100_000_000):
-    url = f"{BASE_URL}/fapi/v1/ticker/24hr"
-    tickers = await fetch(session, url)
-    if tickers is None:
-        return []
-    return [
-        t['symbol'] for t in tickers
-        if t['symbol'].endswith("USDT") and float(t['quoteVolume']) >= min_volume and t['symbol'] not in blacklist
-    ]
+    return await universe.symbols(session, min_volume=min_volume, blacklist=blacklist)
 
 async def get_average_percent_range(session, symbol):
     url = f"{BASE_URL}/fapi/v1/klines"
     params = {"symbol": symbol, "interval": interval, "limit": 100}
-    candles = await fetch(session, url, params)
-    if not candles or len(candles) < 100:
-        return None
+    candles = stream.klines(symbol, interval, 100) if stream is not None else None
+    if candles is None:
+        payload = await session.get(url, params, raw=True)
+        if payload is None:
+            return None
+        try:
+            candles = decode(payload)
+        except ValueError:
+            return None
+        if len(candles) < 100:
+            return None
+    return percent_range(symbol, candles)
 
+def percent_range(symbol, candles):
     # % range = ((High - Low) / Low) * 100 her mum için
-    percent_ranges = [((float(c[2]) - float(c[3])) / float(c[3])) * 100 for c in candles]
+    percent_ranges = (candles.high - candles.low) / candles.low * 100
 
-    avg_percent_range = np.mean(percent_ranges)
-    max_percent_range = max(percent_ranges)
+    avg_percent_range = float(percent_ranges.mean())
+    max_percent_range = float(percent_ranges.max())
     return symbol, round(avg_percent_range, 4), round(max_percent_range, 4)
 
+@register("movers", {interval: 100}, blacklist=blacklist, top=5)
+async def scan(session, symbol, klines):
+    _, avg, max_r = percent_range(symbol, klines[interval])
+    return [(interval, f"Ortalama % Range = %{avg}, En Büyük % Range = %{max_r}", None, max_r)]
+
 async def get_top_range_movers():
-    async with aiohttp.ClientSession() as session:
+    async with Transport(headers=headers) as session:
         symbols = await get_high_volume_symbols(session)
         print(f"\n📊 {interval} için kontrol ediliyor... Toplam {len(symbols)} sembol\n")
         tasks = [get_average_percent_range(session, symbol) for symbol in symbols]
@@ -61,5 +70,19 @@ async def main():
     for symbol, avg, max_r in movers:
         print(f"{Fore.CYAN}- {symbol}: Ortalama % Range = %{avg}, En Büyük % Range = %{max_r}{Style.RESET_ALL}")
 
+async def watch():
+    # Semboller bir kez seçilir, akış açık kaldıkça tarama her watch_every saniyede tekrarlanır
+    global stream
+    async with Transport(headers=headers) as session:
+        symbols = await get_high_volume_symbols(session)
+    stream = KlineStream(size=100)
+    await stream.start(symbols, [interval])
+    try:
+        while True:
+            await main()
+            await asyncio.sleep(watch_every)
+    finally:
+        await stream.stop()
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(watch() if "--watch" in sys.argv else main())
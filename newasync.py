@@ -1,11 +1,18 @@
 import asyncio
-import aiohttp
+import numpy as np
 from colorama import Fore, Style
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinedecode import decode
+from indicators import highest_age
+from patterns import stack, matches as find_patterns, register as register_pattern
+from transport import Transport
+from universe import shared
+from scan import register
 
 asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 BASE_URL = "https://fapi.binance.com"
+universe = shared(BASE_URL)
 intervals = ["15m", "30m", "1h"]
 
 headers = {
@@ -14,181 +21,157 @@ headers = {
 
 blacklist = ["TRXUSDT", "BTCUSDT"]
 
-async def fetch(session, url, params=None):
-    try:
-        async with session.get(url, params=params, headers=headers, timeout=10) as response:
-            return await response.json()
-    except Exception as e:
-        print(f"Fetch error: {e}")
-        return None
+# get_candles önce buna bakar: 15m/30m/1h için KlineStream(size=100)
+stream = None
 
+# Desenler (symbols x son k mum) matrisleri üzerinde maske olarak çalışır, patterns.py
 # Wick uzunluğu hesaplama
-def get_wick_length(candle):
-    o, c, h, l = float(candle[1]), float(candle[4]), float(candle[2]), float(candle[3])
-    body = abs(o - c)
-    wick_up = h - max(o, c)
-    wick_down = min(o, c) - l
+def get_wick_length(bars):
+    body = np.abs(bars.open - bars.close)
+    wick_up = bars.high - np.maximum(bars.open, bars.close)
+    wick_down = np.minimum(bars.open, bars.close) - bars.low
     return wick_up, wick_down, body
 
 # Mumda wick'in uzunluğunun, gövdesinden büyük olmadığını kontrol et
-def is_valid_wick(candle):
-    wick_up, wick_down, body = get_wick_length(candle)
-    return wick_up <= body and wick_down <= body
+def is_valid_wick(bars):
+    wick_up, wick_down, body = get_wick_length(bars)
+    return (wick_up <= body) & (wick_down <= body)
 
-async def is_bullish_engulfing(candles):
-    o1, c1 = float(candles[-2][1]), float(candles[-2][4])
-    o2, c2 = float(candles[-1][1]), float(candles[-1][4])
+def last_three(bars):
+    return (bars.open[:, -3], bars.close[:, -3], bars.open[:, -2], bars.close[:, -2],
+            bars.open[:, -1], bars.close[:, -1])
+
+@register_pattern("Bullish Engulfing", "bullish", enabled=False)
+def is_bullish_engulfing(bars):
+    o1, c1 = bars.open[:, -2], bars.close[:, -2]
+    o2, c2 = bars.open[:, -1], bars.close[:, -1]
 
     return (
-        c1 < o1 and
-        c2 > o2 and
-        (c2 - o2) > (o1 - c1) and
-        o2 < c1 and c2 > o1
+        (c1 < o1) &
+        (c2 > o2) &
+        ((c2 - o2) > (o1 - c1)) &
+        (o2 < c1) & (c2 > o1)
     )
 
-async def is_bearish_engulfing(candles):
-    o1, c1 = float(candles[-2][1]), float(candles[-2][4])
-    o2, c2 = float(candles[-1][1]), float(candles[-1][4])
+@register_pattern("Bearish Engulfing", "bearish", enabled=False)
+def is_bearish_engulfing(bars):
+    o1, c1 = bars.open[:, -2], bars.close[:, -2]
+    o2, c2 = bars.open[:, -1], bars.close[:, -1]
 
     return (
-        c1 > o1 and
-        c2 < o2 and
-        (o1 - c1) > (c2 - o2) and
-        o2 > c1 and c2 < o1
+        (c1 > o1) &
+        (c2 < o2) &
+        ((o1 - c1) > (c2 - o2)) &
+        (o2 > c1) & (c2 < o1)
     )
 
-async def is_morning_star(candles):
-    o1, c1 = float(candles[-3][1]), float(candles[-3][4])
-    o2, c2 = float(candles[-2][1]), float(candles[-2][4])
-    o3, c3 = float(candles[-1][1]), float(candles[-1][4])
+@register_pattern("Custom 3 Candle Bearish", "bearish")
+def is_custom_three_bearish_pattern(bars):
+    o1, c1, o2, c2, o3, c3 = last_three(bars)
 
     return (
-        c1 < o1 and  # 1. mum düşüş
-        abs(o2 - c2) < (0.1 * (float(candles[-2][2]) - float(candles[-2][3]))) and  # 2. mum küçük
-        c3 > o3 and  # 3. mum yükseliş
-        c3 > c2  # 3. mum 2. mumun üstünde kapanıyor
+        is_valid_wick(bars)[:, -3:].all(axis=1) &  # Mumların wick'lerini kontrol et
+        (c1 > o1) &         # 1. mum kırmızı (yani düşüş)
+        (c2 < o2) &         # 2. mum kırmızı değil
+        (c2 < o1) &         # 2. mumun kapanışı 1. mumun açılışının altında
+        (c3 > o3) &         # 3. mum yeşil
+        (c3 < o2)           # 3. mumun kapanışı 2. mumun açılışının altında
     )
 
-async def is_evening_star(candles):
-    o1, c1 = float(candles[-3][1]), float(candles[-3][4])
-    o2, c2 = float(candles[-2][1]), float(candles[-2][4])
-    o3, c3 = float(candles[-1][1]), float(candles[-1][4])
+@register_pattern("Custom 3 Candle Bullish", "bullish")
+def is_custom_three_bullish_pattern(bars):
+    o1, c1, o2, c2, o3, c3 = last_three(bars)
 
     return (
-        c1 > o1 and  # 1. mum yükseliş
-        abs(o2 - c2) < (0.1 * (float(candles[-2][2]) - float(candles[-2][3]))) and  # 2. mum küçük
-        c3 < o3 and  # 3. mum düşüş
-        c3 < c2  # 3. mum 2. mumun altında kapanıyor
+        is_valid_wick(bars)[:, -3:].all(axis=1) &  # Mumların wick'lerini kontrol et
+        (c1 < o1) &         # 1. mum kırmızı
+        (c2 > o2) &         # 2. mum yeşil
+        (c2 > o1) &         # 2. mumun kapanışı 1. mumun açılışının üstünde
+        (c3 > o3) &         # 3. mum yeşil
+        (c3 > o2)           # 3. mumun kapanışı 2. mumun açılışının üstünde
     )
 
-async def is_custom_three_bearish_pattern(candles):
-    o1, c1 = float(candles[-3][1]), float(candles[-3][4])  # 1. mum
-    o2, c2 = float(candles[-2][1]), float(candles[-2][4])  # 2. mum
-    o3, c3 = float(candles[-1][1]), float(candles[-1][4])  # 3. mum
-
-    # Mumların wick'lerini kontrol et
-    if not is_valid_wick(candles[-3]) or not is_valid_wick(candles[-2]) or not is_valid_wick(candles[-1]):
-        return False
+@register_pattern("Morning Star", "bullish")
+def is_morning_star(bars):
+    o1, c1, o2, c2, o3, c3 = last_three(bars)
 
     return (
-        c1 > o1 and         # 1. mum kırmızı (yani düşüş)
-        c2 < o2 and         # 2. mum kırmızı değil
-        c2 < o1 and         # 2. mumun kapanışı 1. mumun açılışının altında
-        c3 > o3 and         # 3. mum yeşil
-        c3 < o2             # 3. mumun kapanışı 2. mumun açılışının altında
+        (c1 < o1) &  # 1. mum düşüş
+        (np.abs(o2 - c2) < (0.1 * (bars.high[:, -2] - bars.low[:, -2]))) &  # 2. mum küçük
+        (c3 > o3) &  # 3. mum yükseliş
+        (c3 > c2)  # 3. mum 2. mumun üstünde kapanıyor
     )
 
-async def is_custom_three_bullish_pattern(candles):
-    o1, c1 = float(candles[-3][1]), float(candles[-3][4])
-    o2, c2 = float(candles[-2][1]), float(candles[-2][4])
-    o3, c3 = float(candles[-1][1]), float(candles[-1][4])
-
-    # Mumların wick'lerini kontrol et
-    if not is_valid_wick(candles[-3]) or not is_valid_wick(candles[-2]) or not is_valid_wick(candles[-1]):
-        return False
+@register_pattern("Evening Star", "bearish")
+def is_evening_star(bars):
+    o1, c1, o2, c2, o3, c3 = last_three(bars)
 
     return (
-        c1 < o1 and         # 1. mum kırmızı
-        c2 > o2 and         # 2. mum yeşil
-        c2 > o1 and         # 2. mumun kapanışı 1. mumun açılışının üstünde
-        c3 > o3 and         # 3. mum yeşil
-        c3 > o2             # 3. mumun kapanışı 2. mumun açılışının üstünde
+        (c1 > o1) &  # 1. mum yükseliş
+        (np.abs(o2 - c2) < (0.1 * (bars.high[:, -2] - bars.low[:, -2]))) &  # 2. mum küçük
+        (c3 < o3) &  # 3. mum düşüş
+        (c3 < c2)  # 3. mum 2. mumun altında kapanıyor
     )
 
-async def is_not_highest_in_100(candles100, candles6):
-    high_100 = max(float(c[2]) for c in candles100)
-    high_6 = max(float(c[2]) for c in candles6)
-    return high_6 < high_100
+def is_not_highest_in_100(bars):
+    # Son 6 mumun tepesi 100 mumun tepesinin altında mı: 100'lük tepe 6 mumdan eski
+    return highest_age(bars.high, 100) >= 6
 
 async def get_high_volume_symbols(session, min_volume=100_000_000):
-    url = f"{BASE_URL}/fapi/v1/ticker/24hr"
-    tickers = await fetch(session, url)
-    if tickers is None:
-        return []
-    return [
-        t['symbol'] for t in tickers
-        if t['symbol'].endswith("USDT") and float(t['quoteVolume']) >= min_volume
-    ]
+    return await universe.symbols(session, min_volume=min_volume)
 
-async def check_symbol(session, symbol, interval):
+async def get_candles(session, symbol, interval):
     if symbol in blacklist:
         return None
 
     url = f"{BASE_URL}/fapi/v1/klines"
     params = {"symbol": symbol, "interval": interval, "limit": 100}
     try:
-        candles100 = await fetch(session, url, params)
-        if candles100 is None or len(candles100) < 100:
-            return None
-
-        candles6 = candles100[-6:]
-        candles2 = candles100[-2:]
-        candles3 = candles100[-3:]
-
-        result_messages = []
-
-        if await is_not_highest_in_100(candles100, candles6):
-            bullish_engulf = await is_bullish_engulfing(candles2)
-            bearish_engulf = await is_bearish_engulfing(candles2)
-            custom_bearish = await is_custom_three_bearish_pattern(candles3)
-            custom_bullish = await is_custom_three_bullish_pattern(candles3)
-            morning_star = await is_morning_star(candles3)
-            evening_star = await is_evening_star(candles3)
-
-            #if bullish_engulf:
-            #    result_messages.append((symbol, "Bullish Engulfing", "bullish", interval))
-            #if bearish_engulf:
-            #    result_messages.append((symbol, "Bearish Engulfing", "bearish", interval))
-            if custom_bearish:
-                result_messages.append((symbol, "Custom 3 Candle Bearish", "bearish", interval))
-            if custom_bullish:
-                result_messages.append((symbol, "Custom 3 Candle Bullish", "bullish", interval))
-            if morning_star:
-                result_messages.append((symbol, "Morning Star", "bullish", interval))
-            if evening_star:
-                result_messages.append((symbol, "Evening Star", "bearish", interval))
-
-        return result_messages if result_messages else None
+        candles100 = stream.klines(symbol, interval, 100) if stream is not None else None
+        if candles100 is None:
+            payload = await session.get(url, params, raw=True)
+            if payload is None:
+                return None
+            candles100 = decode(payload)
+        return candles100 if len(candles100) >= 100 else None
 
     except Exception as e:
         print(f"⚠️ {symbol} ({interval}) - {e}")
         return None
 
+def match_patterns(symbols, interval, blocks):
+    # Tüm semboller tek seferde: son 100 mumdan matris, önce tepe filtresi, sonra desen maskeleri
+    if not symbols:
+        return []
+    bars = stack(blocks, 100)
+    keep = np.flatnonzero(is_not_highest_in_100(bars))
+    bars = type(bars)(*(m[keep, -3:] for m in bars))
+    return [(symbol, pattern_name, pattern_type, interval)
+            for symbol, pattern_name, pattern_type in find_patterns([symbols[i] for i in keep], bars)]
+
+@register("newasync", {interval: 100 for interval in intervals}, blacklist=blacklist)
+async def scan(session, symbol, klines):
+    # scan.py orkestratörü için: mumlar zaten çekilmiş olarak gelir
+    rows = []
+    for interval, candles in klines.items():
+        for _, pattern_name, pattern_type, _ in match_patterns([symbol], interval, [candles]):
+            rows.append((interval, pattern_name, pattern_type, 0))
+    return rows
+
 async def check_all_symbols():
     matches = {interval: [] for interval in intervals}
-    async with aiohttp.ClientSession() as session:
+    async with Transport(headers=headers) as session:
         symbols = await get_high_volume_symbols(session)
 
         print(f"{len(symbols)} sembol günlük hacmi 100M USDT üstünde, kontrol ediliyor...\n")
 
         for interval in intervals:
             print(f"\n⏱️ {interval} zaman dilimi kontrol ediliyor...\n")
-            tasks = [check_symbol(session, symbol, interval) for symbol in symbols]
+            tasks = [get_candles(session, symbol, interval) for symbol in symbols]
             results = await asyncio.gather(*tasks)
 
-            for res in results:
-                if res:
-                    matches[interval].extend(res)
+            found = [(symbol, candles) for symbol, candles in zip(symbols, results) if candles is not None]
+            matches[interval].extend(match_patterns([s for s, _ in found], interval, [c for _, c in found]))
 
     return matches
 
@@ -0,0 +1,166 @@
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from backtester import REASONS, SIGNAL
+from indicatorcache import no_cache
+from klinedecode import OHLCV
+from klinestore import STORE_ROOT, KlineStore
+from sweep import STRATEGIES
+
+
+def stored_symbols(interval, root=STORE_ROOT):
+    # Symbols with a non-empty `interval` series in the local store
+    if not os.path.isdir(root):
+        return []
+    store = KlineStore(root)
+    return sorted(s for s in os.listdir(root) if store.length(s, interval) > 0)
+
+
+def symbol_trades(strategy, symbol, interval, limit, root, params):
+    # Worker: one symbol's closed trades with bar close times, columnar
+    block = KlineStore(root).read(symbol, interval, limit=limit)
+    if len(block) == 0:
+        return None
+    bars = dict(zip(OHLCV, block.values))
+    trades = STRATEGIES[strategy].func(bars, no_cache, **params)
+    closed = trades.exit >= 0
+    worst, worst_bar = worst_prices(bars, trades, closed)
+    return {
+        'symbol': np.full(int(closed.sum()), symbol, dtype=object),
+        'entry_time': block.close_time[trades.entry[closed]],
+        'exit_time': block.close_time[trades.exit[closed]],
+        'side': trades.side[closed],
+        'entry_price': trades.entry_price[closed],
+        'exit_price': trades.exit_price[closed],
+        'worst_price': worst,
+        'worst_time': block.close_time[worst_bar],
+        'reason': REASONS[trades.reason[closed]],
+    }
+
+
+def worst_prices(bars, trades, closed):
+    # Most adverse price while each closed trade was open: the bars after the entry and before
+    # the exit, the exit bar too on a signal exit (filled at its close), and the exit price.
+    # On a stop/target exit bar the level is taken to be reached first. Also returns the first
+    # bar that reached it, the exit bar when nothing before the exit was worse.
+    worst, at = [], []
+    for entry, exit_bar, side, price, reason in zip(trades.entry[closed], trades.exit[closed], trades.side[closed],
+                                                    trades.exit_price[closed], trades.reason[closed]):
+        last = exit_bar + 1 if reason == SIGNAL else exit_bar
+        adverse = -side * bars['low' if side > 0 else 'high'][entry + 1:last]
+        i = int(np.argmax(adverse)) if len(adverse) else 0
+        if len(adverse) and adverse[i] > -side * price:
+            worst.append(-side * adverse[i])
+            at.append(entry + 1 + i)
+        else:
+            worst.append(price)
+            at.append(exit_bar)
+    return np.array(worst, dtype=float), np.array(at, dtype=np.int64)
+
+
+def candidates(strategy, symbols, interval, limit=None, root=STORE_ROOT, params=None, workers=None):
+    # Signal generation and per-symbol simulation fan out over processes; the merged table is
+    # ordered on one time axis by entry time
+    params = params or {}
+    args = [(strategy, s, interval, limit, root, params) for s in symbols]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts = [p for p in pool.map(symbol_trades, *zip(*args), chunksize=max(1, len(args) // 64)) if p]
+    if not parts:
+        return pd.DataFrame(columns=['symbol', 'entry_time', 'exit_time', 'side', 'entry_price', 'exit_price',
+                                     'worst_price', 'worst_time', 'reason'])
+    table = pd.DataFrame({k: np.concatenate([p[k] for p in parts]) for k in parts[0]})
+    return table.sort_values(['entry_time', 'symbol'], kind='stable', ignore_index=True)
+
+
+def allocate(table, balance=1000, size=0.1, leverage=10, max_pos=10, commission=0.0004):
+    # Shared capital: each accepted trade locks `size` of the current balance as margin for a
+    # leverage-times notional; entries beyond max_pos or without free margin are skipped. Exits
+    # on the same timestamp settle before entries. A trade whose worst price moved 1/leverage
+    # against it is liquidated there and its margin is released at the close of that bar; no
+    # trade loses more than its margin. Commission is charged on the entry notional and on the
+    # exit value.
+    entry_time = table['entry_time'].to_numpy()
+    exit_time = table['exit_time'].to_numpy()
+    side = table['side'].to_numpy()
+    entry_price = table['entry_price'].to_numpy()
+    ret = (table['exit_price'].to_numpy() / entry_price - 1) * side
+    liquidated = (table['worst_price'].to_numpy() / entry_price - 1) * side <= -1 / leverage
+    ret = np.where(liquidated, -1 / leverage, ret)
+    release = np.where(liquidated, table['worst_time'].to_numpy(), exit_time)
+    open_heap = []  # (release time, row, margin, notional)
+    free = balance
+    taken = np.zeros(len(table), dtype=bool)
+    margins = np.zeros(len(table))
+    pnl = np.zeros(len(table))
+    settled = []  # (time, balance after the exit)
+
+    def settle(until):
+        nonlocal free, balance
+        while open_heap and open_heap[0][0] <= until:
+            t, row, margin, notional = heapq.heappop(open_heap)
+            exit_value = notional * (1 + side[row] * ret[row])
+            pnl[row] = max(notional * ret[row] - commission * (notional + exit_value), -margin)
+            balance += pnl[row]
+            free += margin + pnl[row]
+            settled.append((t, balance))
+
+    for row in range(len(table)):
+        settle(entry_time[row])
+        margin = balance * size
+        if len(open_heap) >= max_pos or margin <= 0 or margin > free:
+            continue
+        free -= margin
+        taken[row] = True
+        margins[row] = margin
+        heapq.heappush(open_heap, (release[row], row, margin, margin * leverage))
+    settle(np.iinfo(np.int64).max)
+
+    trades = table[taken].assign(margin=margins[taken], pnl=pnl[taken],
+                                 liquidated=liquidated[taken]).reset_index(drop=True)
+    equity = pd.Series([b for _, b in settled], index=pd.to_datetime([t for t, _ in settled], unit='ms'),
+                       name='balance', dtype=float)
+    return trades, equity
+
+
+def summary(trades, equity, start_balance, candidates_count):
+    final = equity.iloc[-1] if len(equity) else start_balance
+    curve = np.concatenate([[start_balance], equity.to_numpy()])
+    drawdown = 1 - curve / np.maximum.accumulate(curve)
+    return {
+        'final_balance': float(final),
+        'return': float(final / start_balance - 1),
+        'trades': len(trades),
+        'skipped': candidates_count - len(trades),
+        'win_rate': float((trades['pnl'] > 0).mean()) if len(trades) else np.nan,
+        'max_drawdown': float(drawdown.max()),
+        'symbols': int(trades['symbol'].nunique()) if len(trades) else 0,
+    }
+
+
+def run(strategy, symbols=None, interval="1h", limit=None, root=STORE_ROOT, params=None, workers=None,
+        balance=1000, size=0.1, leverage=10, max_pos=10, commission=0.0004):
+    symbols = stored_symbols(interval, root) if symbols is None else symbols
+    start = time.time()
+    table = candidates(strategy, symbols, interval, limit, root, params, workers)
+    trades, equity = allocate(table, balance, size, leverage, max_pos, commission)
+    result = summary(trades, equity, balance, len(table))
+    print(f"{len(symbols)} sembol, {len(table)} aday işlem, {time.time() - start:.1f} sn")
+    return trades, equity, result
+
+
+if __name__ == "__main__":
+    # Tarayıcıların seçtiği evren: 100M+ hacimli semboller, yerel kline deposundan
+    from binance.um_futures import UMFutures
+    from universe import shared
+    client = UMFutures()
+    universe = shared()
+    symbols = universe.symbols_sync(client, min_volume=100_000_000)
+    store = KlineStore(client=client)
+    for symbol in symbols:
+        store.load(symbol, "1h", limit=5000)
+    trades, equity, result = run("bollinger", symbols, "1h", params={'period': 20, 'dev': 2},
+                                 leverage=10, max_pos=10)
+    print(result)
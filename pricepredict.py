@@ -1,21 +1,16 @@
-import pandas as pd
-import numpy as np
 from binance.um_futures import UMFutures
 from ta.trend import MACD, EMAIndicator,adx
 from ta.momentum import StochRSIIndicator, rsi
 from sklearn.ensemble import RandomForestRegressor
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinestore import KlineStore
 
 # Binance client for historical data
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+store = KlineStore(client=client)
 
 def get_historical_data(symbol, interval='5m', limit=1000):
-    raw_data = client.klines(symbol=symbol, interval=interval, limit=limit)
-    data = pd.DataFrame(raw_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', '_', '_', '_', '_', '_', '_'])
-    data = data[['timestamp', 'open', 'high', 'low', 'close', 'volume']].astype(float)
-    data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
-    data.set_index('timestamp', inplace=True)
-    return data
+    return store.frame(symbol, interval, limit, index_name='timestamp')
 
 def create_target_variable(data):
     data['next_close'] = data['close'].shift(-1)
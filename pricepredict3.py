@@ -8,17 +8,14 @@ from ta.volatility import AverageTrueRange
 from xgboost import XGBClassifier
 from sklearn.model_selection import train_test_split
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinestore import KlineStore
 
 # Binance client
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+store = KlineStore(client=client)
 
 def get_historical_data(symbol, interval='5m', limit=1000):
-    raw_data = client.klines(symbol=symbol, interval=interval, limit=limit)
-    data = pd.DataFrame(raw_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', '_', '_', '_', '_', '_', '_'])
-    data = data[['timestamp', 'open', 'high', 'low', 'close', 'volume']].astype(float)
-    data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
-    data.set_index('timestamp', inplace=True)
-    return data
+    return store.frame(symbol, interval, limit, index_name='timestamp')
 
 # Hedef değişkeni oluşturma
 
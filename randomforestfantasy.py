@@ -1,16 +1,20 @@
+import json
+import os
 import time
 from datetime import datetime
-import ta
-import ta.trend
 import numpy as np
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from klinedecode import decode, to_frame
+from streaming import HMA, Bollinger
 from binance.um_futures import UMFutures
 import pandas as pd
 from binance.error import ClientError
+from symbolinfo import shared
 from pricepredict2 import analyze_and_predict_close
 from pricepredict3 import analyze_and_predict
 
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+symbols = shared(client)
 
 volume = 30
 leverage = 20
@@ -35,66 +39,94 @@ volume = 50
 
 def klines(symbol, interval):
     try:
-        resp = pd.DataFrame(client.klines(symbol, interval))
-        resp = resp.iloc[:, :6]
-        resp.columns = ['open_time', 'open', 'high', 'low', 'close', 'volume']
-        resp = resp.set_index('open_time')
-        resp.index = pd.to_datetime(resp.index, unit='ms')
-        resp = resp.astype(float)
-        return resp
+        return to_frame(client.klines(symbol, interval))
     except ClientError as error:
         print("Found error. status: {}, error code: {}, error message: {}".format(
             error.status_code, error.error_code, error.error_message
         ))
 
-def calculate_signal(symbol, interval='1m'):
-    df = klines(symbol, interval)
-    
-    # Bollinger Bandı
-    df['bb_percent_b'] = ta.volatility.BollingerBands(df['close']).bollinger_pband()
-
-    # Hull MA hesaplaması
-    hma_period = 180  # HMA için kullanılan periyot
-    half_length = hma_period // 2
-    sqrt_length = int(hma_period ** 0.5)
-
-    # WMA hesaplama
-    wma1 = ta.trend.WMAIndicator(df['close'], window=half_length).wma()
-    wma2 = ta.trend.WMAIndicator(df['close'], window=hma_period).wma()
+# Bollinger ve HMA durumu her çalıştırmada buradan devam eder, seri baştan taranmaz
+SIGNAL_STATE_PATH = "signal_state.json"
+hma_period = 180  # HMA için kullanılan periyot
 
-    # WMA farkını al
-    wma_diff = 2 * wma1 - wma2
-
-    # HMA'yı hesapla
-    hma = ta.trend.WMAIndicator(wma_diff, window=sqrt_length).wma()
-
-    # HMA'yı dataframe'e ekle
-    df['hma'] = hma
+def load_signal_state():
+    if not os.path.exists(SIGNAL_STATE_PATH):
+        return {}
+    try:
+        with open(SIGNAL_STATE_PATH) as file:
+            return json.load(file)
+    except (OSError, ValueError) as err:
+        print(f"Signal state could not be read: {err}")
+        return {}
+
+def save_signal_state(states):
+    tmp = SIGNAL_STATE_PATH + ".tmp"
+    with open(tmp, "w") as file:
+        json.dump(states, file)
+    os.replace(tmp, SIGNAL_STATE_PATH)
+
+def signal_candles(symbol, interval, state):
+    # Checkpoint varsa sadece son kapanıştan sonraki mumlar (kapananlar + oluşan) çekilir;
+    # sayfa dolarsa arada daha fazlası kalmıştır, baştan kurulur (HMA'sız eski dosyalar da)
+    try:
+        if state is not None and 'hma' in state:
+            candles = decode(client.klines(symbol=symbol, interval=interval, startTime=state['last'] + 1, limit=1500))
+            if 0 < len(candles) < 1500 and candles.time[0] == state['last'] + 1:
+                return candles, Bollinger.restore(state['bb']), HMA.restore(state['hma']), state['close']
+        return decode(client.klines(symbol, interval)), Bollinger(), HMA(hma_period), None
+    except ClientError as error:
+        print("Found error. status: {}, error code: {}, error message: {}".format(
+            error.status_code, error.error_code, error.error_message
+        ))
 
-    row = df.iloc[-1]
-    prew = df.iloc[-2]
-    print("BBpercent_b: ", row['bb_percent_b'] )
+def calculate_signal(symbol, interval='1m'):
+    states = load_signal_state()
+    key = f"{symbol}_{interval}"
+    loaded = signal_candles(symbol, interval, states.get(key))
+    if loaded is None:
+        return 'hold'
+    candles, bb, hma, prev_close = loaded
+
+    # Kapanan mumlar bir kez işlenir, son (oluşan) mum sadece peek ile okunur
+    for close in candles.close[:-1]:
+        bb.update(close)
+        hma.update(close)
+    if len(candles) > 1:
+        prev_close = float(candles.close[-2])
+        last = int(candles.close_time[-2])
+        # Dosya sadece yeni bir mum kapandığında (ya da HMA'sız eski durum yenilendiğinde) yazılır
+        saved = states.get(key, {})
+        if last != saved.get('last') or 'hma' not in saved:
+            states[key] = {'last': last, 'close': prev_close, 'bb': bb.state(), 'hma': hma.state()}
+            save_signal_state(states)
+
+    close = float(candles.close[-1])
+    band, prev_band = bb.peek(close), bb.value
+    if band is None or prev_band is None:
+        return 'hold'
+    percent_b = band.percent(close)
+    prew_percent_b = prev_band.percent(prev_close)
+    print("BBpercent_b: ", percent_b)
+    print("HMA: ", hma.peek(close))
 
     # İşlem sinyalleri
-    if row['bb_percent_b'] > 0 and prew['bb_percent_b'] < 0:
+    if percent_b > 0 and prew_percent_b < 0:
         return 'buy'
-    elif row['bb_percent_b'] < 1 and prew['bb_percent_b'] > 1:
+    elif percent_b < 1 and prew_percent_b > 1:
         return 'sell'
     
     return 'hold'
 
 
 def get_price_precision(symbol):
-    resp = client.exchange_info()['symbols']
-    for elem in resp:
-        if elem['symbol'] == symbol:
-            return elem['pricePrecision']
+    info = symbols.get(symbol)
+    if info is not None:
+        return info['pricePrecision']
         
 def get_qty_precision(symbol):
-    resp = client.exchange_info()['symbols']
-    for elem in resp:
-        if elem['symbol'] == symbol:
-            return elem['quantityPrecision']
+    info = symbols.get(symbol)
+    if info is not None:
+        return info['quantityPrecision']
         
 
 def open_order(symbol, side):
@@ -1,45 +1,42 @@
 import asyncio
-import aiohttp
 import pandas as pd
 import ta
 import time
 import sys
+from transport import Transport
+from universe import shared
 
 if sys.platform.startswith('win') and sys.version_info >= (3, 8):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 BASE_URL = 'https://api.binance.com'
+universe = shared(BASE_URL)
 
 HEADERS = {
     'Accepts': 'application/json',
     'User-Agent': 'binance-ranger'
 }
 
-async def fetch_usdt_symbols():
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
-        async with session.get(f'{BASE_URL}/api/v3/exchangeInfo') as resp:
-            data = await resp.json()
-            symbols = [
-                s['symbol'] for s in data['symbols']
-                if s['quoteAsset'] == 'USDT' and s['status'] == 'TRADING'
-                and 'UP' not in s['symbol'] and 'DOWN' not in s['symbol'] and 'BULL' not in s['symbol']
-            ]
-            return symbols
+async def fetch_usdt_symbols(session):
+    symbols = [
+        s for s in await universe.symbols(session)
+        if 'UP' not in s and 'DOWN' not in s and 'BULL' not in s
+    ]
+    return symbols
 
 async def fetch_klines(session, symbol, interval='1h', limit=100):
     url = f'{BASE_URL}/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}'
     try:
-        async with session.get(url) as resp:
-            data = await resp.json()
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
-            df['close'] = df['close'].astype(float)
-            df['high'] = df['high'].astype(float)
-            df['low'] = df['low'].astype(float)
-            return symbol, df
+        data = await session.get(url)
+        df = pd.DataFrame(data, columns=[
+            'timestamp', 'open', 'high', 'low', 'close', 'volume',
+            'close_time', 'quote_asset_volume', 'number_of_trades',
+            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+        ])
+        df['close'] = df['close'].astype(float)
+        df['high'] = df['high'].astype(float)
+        df['low'] = df['low'].astype(float)
+        return symbol, df
     except:
         return symbol, None
 
@@ -70,11 +67,12 @@ async def check_symbol(session, symbol):
 
 async def main():
     start = time.time()
-    symbols = await fetch_usdt_symbols()
-    print(f"Toplam {len(symbols)} USDT paritesi taranacak...\n")
-
     results = []
-    async with aiohttp.ClientSession(headers=HEADERS) as session:
+    # Spot API dakikada 6000 ağırlık tanır
+    async with Transport(BASE_URL, headers=HEADERS, weight_limit=6000) as session:
+        symbols = await fetch_usdt_symbols(session)
+        print(f"Toplam {len(symbols)} USDT paritesi taranacak...\n")
+
         tasks = [check_symbol(session, symbol) for symbol in symbols]
         ranged = await asyncio.gather(*tasks)
         results = [s for s in ranged if s]
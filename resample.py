@@ -0,0 +1,106 @@
+import numpy as np
+from klinedecode import FIELDS, KlineBlock
+from klinestream import RingBuffer
+from transport import request_weight
+
+MINUTE = 60_000
+UNITS = {'m': MINUTE, 'h': 60 * MINUTE, 'd': 1440 * MINUTE, 'w': 10080 * MINUTE}
+# Binance weekly candles open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET = 4 * UNITS['d']
+OPEN, HIGH, LOW, CLOSE = (FIELDS.index(name) for name in ('open', 'high', 'low', 'close'))
+SUMMED = [FIELDS.index(name) for name in ('volume', 'quote_volume', 'trades', 'taker_buy_base', 'taker_buy_quote')]
+
+
+def interval_ms(interval):
+    return int(interval[:-1]) * UNITS[interval[-1]]
+
+
+def bucket_start(open_time, interval):
+    # UTC-aligned bucket open time, works on scalars and arrays
+    ms = interval_ms(interval)
+    offset = WEEK_OFFSET if interval.endswith('w') else 0
+    return (open_time - offset) // ms * ms + offset
+
+
+def base_interval(intervals):
+    # Smallest requested interval; every other one must be a whole multiple of it
+    base = min(intervals, key=interval_ms)
+    for interval in intervals:
+        if interval_ms(interval) % interval_ms(base):
+            raise ValueError(f"{interval} is not a multiple of {base}")
+    return base
+
+
+def base_limit(intervals, limit, base=None):
+    # Base candles needed for `limit` candles of every interval, plus one bucket for a partial start
+    base = base or base_interval(intervals)
+    return max((limit + 1) * interval_ms(i) // interval_ms(base) for i in intervals)
+
+
+def resample_pays(intervals, limit, path="/fapi/v1/klines"):
+    # One base download covering every interval against one `limit` download per interval, in REST weight
+    single = request_weight(path, {'limit': base_limit(intervals, limit)})
+    return single <= sum(request_weight(path, {'limit': limit}) for _ in intervals)
+
+
+def resample(block, interval, base='1m'):
+    if len(block) == 0:
+        return block
+    ms = interval_ms(interval)
+    if ms == interval_ms(base):
+        return block
+    buckets = bucket_start(block.time, interval)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if buckets[0] != block.time[0]:
+        # The oldest bucket began before the base series did
+        starts = starts[1:]
+        if len(starts) == 0:
+            return KlineBlock(block.time[:0], block.close_time[:0], block.values[:, :0])
+        block = block[int(starts[0]):]
+        buckets = buckets[int(starts[0]):]
+        starts = starts - starts[0]
+    ends = np.r_[starts[1:], len(block)] - 1
+    v = block.values
+    out = np.empty((len(FIELDS), len(starts)), dtype=v.dtype)
+    out[OPEN] = v[OPEN, starts]
+    out[HIGH] = np.maximum.reduceat(v[HIGH], starts)
+    out[LOW] = np.minimum.reduceat(v[LOW], starts)
+    out[CLOSE] = v[CLOSE, ends]
+    out[SUMMED] = np.add.reduceat(v[SUMMED], starts, axis=1)
+    time = buckets[starts]
+    return KlineBlock(time, time + ms - 1, out)
+
+
+class Resampler:
+    # Keeps every target interval of one symbol current as closed base candles arrive
+    def __init__(self, intervals, size=500, base='1m'):
+        self.base = base
+        self.buffers = {interval: RingBuffer(size) for interval in intervals}
+        self.last = None
+
+    def seed(self, block):
+        for interval, buf in self.buffers.items():
+            buf.extend(resample(block, interval, self.base))
+        if len(block):
+            self.last = int(block.time[-1])
+
+    def update(self, open_time, values):
+        # Closed base candles only; a repeated open time would be counted twice
+        if self.last is not None and open_time <= self.last:
+            return
+        self.last = open_time
+        values = np.asarray(values, dtype=float)
+        for interval, buf in self.buffers.items():
+            start = int(bucket_start(open_time, interval))
+            if buf.count and buf.time[buf.head] == start:
+                row = buf.values[:, buf.head].copy()
+                row[HIGH] = max(row[HIGH], values[HIGH])
+                row[LOW] = min(row[LOW], values[LOW])
+                row[CLOSE] = values[CLOSE]
+                row[SUMMED] += values[SUMMED]
+            else:
+                row = values
+            buf.push(start, start + interval_ms(interval) - 1, row)
+
+    def klines(self, interval, limit=None):
+        return self.buffers[interval].view(limit)
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from colorama import Fore, Style
+from klinedecode import concat, decode
+from resample import interval_ms, resample
+from transport import Transport, request_weight
+from universe import shared
+
+BASE_URL = "https://fapi.binance.com"
+PAGE_LIMIT = 1500
+KLINES = "/fapi/v1/klines"
+# Kline intervals the exchange serves; anything else (e.g. 3h) is resampled
+INTERVALS = ('1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d', '3d', '1w', '1M')
+SCANNERS = []
+
+
+class Scanner:
+    # func(session, symbol, klines) -> list of (interval, text, side, score) or None;
+    # klines maps every interval in `needs` to a read-only KlineBlock of exactly that length.
+    def __init__(self, name, func, needs, min_volume=100_000_000, blacklist=(), top=None):
+        self.name = name
+        self.func = func
+        self.needs = needs
+        self.min_volume = min_volume
+        self.blacklist = tuple(blacklist)
+        self.top = top
+
+
+def register(name, needs, min_volume=100_000_000, blacklist=(), top=None):
+    def wrap(func):
+        SCANNERS.append(Scanner(name, func, needs, min_volume, blacklist, top))
+        return func
+    return wrap
+
+
+def fetch_weight(limit):
+    # Weight of pulling `limit` candles in PAGE_LIMIT pages
+    full, rest = divmod(limit, PAGE_LIMIT)
+    return full * request_weight(KLINES, {'limit': PAGE_LIMIT}) + (request_weight(KLINES, {'limit': rest}) if rest else 0)
+
+
+def native_base(interval):
+    # Longest served interval that `interval` is a whole multiple of
+    ms = interval_ms(interval)
+    return max((i for i in INTERVALS if not i.endswith('M') and ms % interval_ms(i) == 0), key=interval_ms)
+
+
+def plan(scanners):
+    # Longest request per interval across scanners. Intervals the exchange does not serve are
+    # always resampled from a served one; a served interval is resampled from the smallest
+    # one only when that is cheaper than downloading it on its own.
+    needs = {}
+    for scanner in scanners:
+        for interval, limit in scanner.needs.items():
+            needs[interval] = max(needs.get(interval, 0), limit)
+    if not needs:
+        return {}, {}
+    base = native_base(min(needs, key=interval_ms))
+    fetch = {base: needs.get(base, 0)}
+    derived = {}
+    for interval in sorted(needs, key=interval_ms):
+        if interval == base:
+            continue
+        ratio, rest = divmod(interval_ms(interval), interval_ms(base))
+        if interval not in INTERVALS:
+            source = base if rest == 0 else native_base(interval)
+            ratio = interval_ms(interval) // interval_ms(source)
+            fetch[source] = max(fetch.get(source, 0), (needs[interval] + 1) * ratio)
+            derived.pop(source, None)
+            derived[interval] = source
+            continue
+        required = (needs[interval] + 1) * ratio
+        extra = fetch_weight(max(fetch[base], required)) - fetch_weight(fetch[base])
+        if rest == 0 and extra <= fetch_weight(needs[interval]):
+            fetch[base] = max(fetch[base], required)
+            derived[interval] = base
+        else:
+            fetch[interval] = max(fetch.get(interval, 0), needs[interval])
+    unserved = sorted(set(fetch) - set(INTERVALS))
+    if unserved:
+        raise ValueError(f"Not a Binance kline interval: {unserved}")
+    return fetch, derived
+
+
+def freeze(block):
+    for array in (block.time, block.close_time, block.values):
+        array.setflags(write=False)
+    return block
+
+
+async def get_klines(session, symbol, interval, limit):
+    pages = []
+    remaining = limit
+    end_time = None
+    while remaining > 0:
+        params = {"symbol": symbol, "interval": interval, "limit": min(remaining, PAGE_LIMIT)}
+        if end_time is not None:
+            params["endTime"] = end_time
+        payload = await session.get(KLINES, params, raw=True)
+        if payload is None:
+            return None
+        try:
+            page = decode(payload)
+        except ValueError:
+            return None
+        if len(page) == 0:
+            break
+        pages.append(page)
+        remaining -= len(page)
+        if len(page) < params["limit"]:
+            break
+        end_time = int(page.time[0]) - 1
+    if not pages:
+        return None
+    return concat(reversed(pages))
+
+
+async def load_symbol(session, symbol, fetch, derived):
+    blocks = await asyncio.gather(*(get_klines(session, symbol, i, n) for i, n in fetch.items()))
+    series = {i: freeze(b) for i, b in zip(fetch, blocks) if b is not None}
+    for interval, base in derived.items():
+        if base in series:
+            series[interval] = freeze(resample(series[base], interval, base))
+    return series
+
+
+async def run_scanner(scanner, session, symbol, series):
+    klines = {}
+    for interval, limit in scanner.needs.items():
+        block = series.get(interval)
+        if block is None or len(block) < limit:
+            return []
+        klines[interval] = block[-limit:]
+    try:
+        rows = await scanner.func(session, symbol, klines)
+    except Exception as e:
+        print(f"⚠️ {scanner.name} {symbol} - {e}")
+        return []
+    return [(scanner.name, symbol) + tuple(row) for row in rows or []]
+
+
+async def run(scanners=None, base_url=BASE_URL, headers=None):
+    scanners = scanners or SCANNERS
+    universe = shared(base_url)
+    fetch, derived = plan(scanners)
+    start = time.time()
+    async with Transport(base_url, headers=headers) as session:
+        await universe.load(session, volumes=any(s.min_volume for s in scanners))
+        wanted = {s.name: universe.select(min_volume=s.min_volume, blacklist=s.blacklist) for s in scanners}
+        symbols = sorted(set().union(*wanted.values()))
+        print(f"{len(symbols)} sembol, {len(scanners)} tarayıcı; çekilen: {fetch}, türetilen: {list(derived)}")
+        data = await asyncio.gather(*(load_symbol(session, s, fetch, derived) for s in symbols))
+        tasks = [run_scanner(scanner, session, symbol, series)
+                 for scanner in scanners
+                 for symbol, series in zip(symbols, data) if symbol in wanted[scanner.name]]
+        results = await asyncio.gather(*tasks)
+        used = session.limiter.used
+    rows = [row for result in results for row in result]
+    print(f"Tarama {time.time() - start:.2f} sn, kullanılan ağırlık ~{used}")
+    return merge(scanners, rows)
+
+
+def merge(scanners, rows):
+    # scanner -> rows (best first, cut to `top`), plus symbols flagged by more than one scanner
+    report = {}
+    for scanner in scanners:
+        found = sorted((r for r in rows if r[0] == scanner.name), key=lambda r: -r[5])
+        report[scanner.name] = found[:scanner.top] if scanner.top else found
+    hits = {}
+    for found in report.values():
+        for name, symbol, *_ in found:
+            hits.setdefault(symbol, set()).add(name)
+    confluence = {symbol: sorted(names) for symbol, names in hits.items() if len(names) > 1}
+    return report, confluence
+
+
+def print_report(report, confluence):
+    for name, found in report.items():
+        print(f"\n📋 {name}")
+        if not found:
+            print("Sonuç yok.")
+        for _, symbol, interval, text, side, _ in found:
+            color = Fore.GREEN if side == "bullish" else Fore.RED if side == "bearish" else Fore.CYAN
+            print(f"{color}- {symbol} ({interval}) - {text}{Style.RESET_ALL}")
+    if confluence:
+        print("\n🎯 Birden fazla tarayıcıda çıkanlar:")
+        for symbol, names in sorted(confluence.items(), key=lambda x: -len(x[1])):
+            print(f"- {symbol}: {', '.join(names)}")
+
+
+if __name__ == "__main__":
+    # Importing the scanner scripts registers them; they register into the `scan` module,
+    # not into this __main__ copy
+    import newasync, cumulative, alllaaa, movefinder, alla2
+    import scan
+    scan.print_report(*asyncio.run(scan.run()))
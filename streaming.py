@@ -0,0 +1,459 @@
+import math
+from collections import deque, namedtuple
+import numpy as np
+
+# Running sums are rebuilt from the window every RESYNC updates so float drift never accumulates
+RESYNC = 1000
+
+
+class Band(namedtuple('Band', 'mid high low')):
+    def percent(self, x):
+        # Bollinger %B, ta's bollinger_pband
+        width = self.high - self.low
+        return (x - self.low) / width if width else 0.0
+
+
+MACDValue = namedtuple('MACDValue', 'macd signal diff')
+
+
+class Indicator:
+    # update() commits one closed bar and returns the new value (None while warming up);
+    # peek() returns what the value would be for a forming bar without committing it.
+    value = None
+
+    def seed(self, *columns):
+        for bar in zip(*columns):
+            self.update(*bar)
+        return self.value
+
+
+class EMA(Indicator):
+    # ewm(span=period, adjust=False, min_periods=period), seeded with the first value
+    def __init__(self, period, alpha=None, min_periods=None):
+        self.alpha = alpha or 2 / (period + 1)
+        self.min_periods = period if min_periods is None else min_periods
+        self.ema = None
+        self.count = 0
+
+    def next(self, x):
+        return x if self.ema is None else self.ema + self.alpha * (x - self.ema)
+
+    def update(self, x):
+        self.ema = self.next(x)
+        self.count += 1
+        self.value = self.ema if self.count >= self.min_periods else None
+        return self.value
+
+    def peek(self, x):
+        return self.next(x) if self.count + 1 >= self.min_periods else None
+
+    def state(self):
+        return {'alpha': self.alpha, 'min_periods': self.min_periods, 'ema': self.ema, 'count': self.count}
+
+    @classmethod
+    def restore(cls, state):
+        ema = cls(state['min_periods'], state['alpha'], state['min_periods'])
+        ema.ema = state['ema']
+        ema.count = state['count']
+        ema.value = ema.ema if ema.count >= ema.min_periods else None
+        return ema
+
+
+class SMA(Indicator):
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, x):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        self.updates += 1
+        if self.updates % RESYNC == 0:
+            self.total = math.fsum(self.window)
+        self.value = self.total / self.period if len(self.window) == self.period else None
+        return self.value
+
+    def peek(self, x):
+        n = len(self.window)
+        if n + 1 < self.period:
+            return None
+        return (self.total + x - (self.window[0] if n == self.period else 0.0)) / self.period
+
+    def state(self):
+        return {'period': self.period, 'window': list(self.window), 'updates': self.updates}
+
+    @classmethod
+    def restore(cls, state):
+        sma = cls(state['period'])
+        sma.window.extend(state['window'])
+        sma.updates = state['updates']
+        sma.total = math.fsum(sma.window)
+        if len(sma.window) == sma.period:
+            sma.value = sma.total / sma.period
+        return sma
+
+
+class WMA(Indicator):
+    # Weights 1..period, newest heaviest. Sliding the window lowers every weight by one,
+    # so weighted' = weighted + period * x - total.
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.weighted = 0.0
+        self.divisor = period * (period + 1) / 2
+        self.updates = 0
+
+    def next(self, x):
+        n = len(self.window)
+        if n == self.period:
+            return self.weighted + self.period * x - self.total, self.total + x - self.window[0]
+        return self.weighted + (n + 1) * x, self.total + x
+
+    def update(self, x):
+        self.weighted, self.total = self.next(x)
+        self.window.append(x)
+        self.updates += 1
+        if self.updates % RESYNC == 0:
+            self.resync()
+        self.value = self.weighted / self.divisor if len(self.window) == self.period else None
+        return self.value
+
+    def peek(self, x):
+        if len(self.window) + 1 < self.period:
+            return None
+        return self.next(x)[0] / self.divisor
+
+    def resync(self):
+        self.total = math.fsum(self.window)
+        self.weighted = math.fsum(i * v for i, v in enumerate(self.window, 1))
+
+    def state(self):
+        return {'period': self.period, 'window': list(self.window), 'updates': self.updates}
+
+    @classmethod
+    def restore(cls, state):
+        wma = cls(state['period'])
+        wma.window.extend(state['window'])
+        wma.updates = state['updates']
+        wma.resync()
+        if len(wma.window) == wma.period:
+            wma.value = wma.weighted / wma.divisor
+        return wma
+
+
+class HMA(Indicator):
+    # Hull MA: WMA(sqrt(n)) of 2 * WMA(n/2) - WMA(n), built from O(1) WMAs; the outer WMA
+    # only sees values once both inner ones are warm, like ta's NaN-propagating rolling windows
+    def __init__(self, period=180):
+        self.period = period
+        self.half = WMA(period // 2)
+        self.full = WMA(period)
+        self.out = WMA(int(period ** 0.5))
+
+    def update(self, x):
+        half, full = self.half.update(x), self.full.update(x)
+        if half is not None and full is not None:
+            self.value = self.out.update(2 * half - full)
+        return self.value
+
+    def peek(self, x):
+        half, full = self.half.peek(x), self.full.peek(x)
+        if half is None or full is None:
+            return None
+        return self.out.peek(2 * half - full)
+
+    def state(self):
+        return {'period': self.period, 'half': self.half.state(), 'full': self.full.state(), 'out': self.out.state()}
+
+    @classmethod
+    def restore(cls, state):
+        hma = cls(state['period'])
+        hma.half, hma.full, hma.out = (WMA.restore(state[k]) for k in ('half', 'full', 'out'))
+        hma.value = hma.out.value
+        return hma
+
+
+class Bollinger(Indicator):
+    # Rolling mean and population std (ddof=0, as ta) from running sums of x - shift;
+    # the shift keeps the variance from cancelling at high price levels.
+    def __init__(self, period=20, dev=2):
+        self.period = period
+        self.dev = dev
+        self.window = deque(maxlen=period)
+        self.shift = None
+        self.s1 = self.s2 = 0.0
+        self.updates = 0
+
+    def band(self, s1, s2):
+        mean = s1 / self.period
+        std = math.sqrt(max(s2 / self.period - mean * mean, 0.0))
+        mid = self.shift + mean
+        return Band(mid, mid + self.dev * std, mid - self.dev * std)
+
+    def next(self, x):
+        d = x - self.shift
+        s1, s2 = self.s1 + d, self.s2 + d * d
+        if len(self.window) == self.period:
+            old = self.window[0] - self.shift
+            s1, s2 = s1 - old, s2 - old * old
+        return s1, s2
+
+    def update(self, x):
+        if self.shift is None:
+            self.shift = x
+        self.s1, self.s2 = self.next(x)
+        self.window.append(x)
+        self.updates += 1
+        if self.updates % RESYNC == 0:
+            self.resync()
+        self.value = self.band(self.s1, self.s2) if len(self.window) == self.period else None
+        return self.value
+
+    def resync(self):
+        self.shift = math.fsum(self.window) / len(self.window)
+        self.s1 = math.fsum(v - self.shift for v in self.window)
+        self.s2 = math.fsum((v - self.shift) ** 2 for v in self.window)
+
+    def state(self):
+        return {'period': self.period, 'dev': self.dev, 'window': list(self.window), 'updates': self.updates}
+
+    @classmethod
+    def restore(cls, state):
+        bb = cls(state['period'], state['dev'])
+        bb.window.extend(state['window'])
+        bb.updates = state['updates']
+        if bb.window:
+            bb.resync()
+        if len(bb.window) == bb.period:
+            bb.value = bb.band(bb.s1, bb.s2)
+        return bb
+
+    def peek(self, x):
+        if len(self.window) + 1 < self.period:
+            return None
+        if self.shift is None:
+            self.shift = x
+        return self.band(*self.next(x))
+
+
+class RSI(Indicator):
+    # ta.momentum.RSIIndicator: Wilder averages as ewm(alpha=1/period); ta counts the first
+    # bar as a zero change, so the averages start at 0 there
+    def __init__(self, period=14):
+        self.period = period
+        self.up = EMA(period, alpha=1 / period)
+        self.down = EMA(period, alpha=1 / period)
+        self.prev = None
+
+    @staticmethod
+    def rsi(up, down):
+        if up is None or down is None:
+            return None
+        return 100.0 if down == 0 else 100 - 100 / (1 + up / down)
+
+    def update(self, close):
+        change = 0.0 if self.prev is None else close - self.prev
+        self.value = self.rsi(self.up.update(max(change, 0.0)), self.down.update(max(-change, 0.0)))
+        self.prev = close
+        return self.value
+
+    def peek(self, close):
+        change = 0.0 if self.prev is None else close - self.prev
+        return self.rsi(self.up.peek(max(change, 0.0)), self.down.peek(max(-change, 0.0)))
+
+    def state(self):
+        return {'period': self.period, 'up': self.up.state(), 'down': self.down.state(), 'prev': self.prev}
+
+    @classmethod
+    def restore(cls, state):
+        rsi = cls(state['period'])
+        rsi.up, rsi.down = EMA.restore(state['up']), EMA.restore(state['down'])
+        rsi.prev = state['prev']
+        rsi.value = rsi.rsi(rsi.up.value, rsi.down.value)
+        return rsi
+
+
+class MACD(Indicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    @staticmethod
+    def combine(macd, signal):
+        return MACDValue(macd, signal, None if signal is None else macd - signal)
+
+    def update(self, close):
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if fast is not None and slow is not None:
+            macd = fast - slow
+            self.value = self.combine(macd, self.signal.update(macd))
+        return self.value
+
+    def peek(self, close):
+        fast, slow = self.fast.peek(close), self.slow.peek(close)
+        if fast is None or slow is None:
+            return None
+        macd = fast - slow
+        return self.combine(macd, self.signal.peek(macd))
+
+    def state(self):
+        return {'fast': self.fast.state(), 'slow': self.slow.state(), 'signal': self.signal.state()}
+
+    @classmethod
+    def restore(cls, state):
+        macd = cls()
+        macd.fast, macd.slow, macd.signal = (EMA.restore(state[k]) for k in ('fast', 'slow', 'signal'))
+        if macd.fast.value is not None and macd.slow.value is not None:
+            macd.value = macd.combine(macd.fast.value - macd.slow.value, macd.signal.value)
+        return macd
+
+
+class ATR(Indicator):
+    # ta.volatility.AverageTrueRange: mean of the first `period` true ranges, then Wilder smoothing
+    def __init__(self, period=14):
+        self.period = period
+        self.prev = None
+        self.count = 0
+        self.total = 0.0
+        self.atr = None
+
+    def true_range(self, high, low):
+        if self.prev is None:
+            return high - low
+        return max(high - low, abs(high - self.prev), abs(low - self.prev))
+
+    def next(self, high, low):
+        tr = self.true_range(high, low)
+        if self.atr is not None:
+            return (self.atr * (self.period - 1) + tr) / self.period, tr
+        if self.count + 1 == self.period:
+            return (self.total + tr) / self.period, tr
+        return None, tr
+
+    def update(self, high, low, close):
+        self.atr, tr = self.next(high, low)
+        self.total += tr
+        self.count += 1
+        self.prev = close
+        self.value = self.atr
+        return self.value
+
+    def peek(self, high, low, close=None):
+        return self.next(high, low)[0]
+
+    def state(self):
+        return {'period': self.period, 'prev': self.prev, 'count': self.count, 'total': self.total, 'atr': self.atr}
+
+    @classmethod
+    def restore(cls, state):
+        atr = cls(state['period'])
+        atr.prev, atr.count, atr.total, atr.atr = state['prev'], state['count'], state['total'], state['atr']
+        atr.value = atr.atr
+        return atr
+
+
+class OBV(Indicator):
+    def __init__(self):
+        self.prev = None
+        self.value = 0.0
+
+    def next(self, close, volume):
+        return self.value - volume if self.prev is not None and close < self.prev else self.value + volume
+
+    def update(self, close, volume):
+        self.value = self.next(close, volume)
+        self.prev = close
+        return self.value
+
+    def peek(self, close, volume):
+        return self.next(close, volume)
+
+    def state(self):
+        return {'prev': self.prev, 'value': self.value}
+
+    @classmethod
+    def restore(cls, state):
+        obv = cls()
+        obv.prev, obv.value = state['prev'], state['value']
+        return obv
+
+
+class VWAP(Indicator):
+    # Rolling VWAP over `window` bars like ta, or anchored (window=None) until reset()
+    def __init__(self, window=14):
+        self.window = window
+        self.bars = deque(maxlen=window)
+        self.pv = self.volume = 0.0
+        self.count = 0
+
+    def reset(self):
+        self.bars.clear()
+        self.pv = self.volume = 0.0
+        self.count = 0
+        self.value = None
+
+    def next(self, high, low, close, volume):
+        pv = (high + low + close) / 3.0 * volume
+        total_pv, total_volume = self.pv + pv, self.volume + volume
+        if self.window is not None and len(self.bars) == self.window:
+            total_pv -= self.bars[0][0]
+            total_volume -= self.bars[0][1]
+        return pv, total_pv, total_volume
+
+    def ready(self, count):
+        return self.window is None or count >= self.window
+
+    def update(self, high, low, close, volume):
+        pv, self.pv, self.volume = self.next(high, low, close, volume)
+        self.bars.append((pv, volume))
+        self.count += 1
+        if self.window is not None and self.count % RESYNC == 0:
+            self.pv = math.fsum(b[0] for b in self.bars)
+            self.volume = math.fsum(b[1] for b in self.bars)
+        self.value = self.pv / self.volume if self.ready(self.count) and self.volume else None
+        return self.value
+
+    def peek(self, high, low, close, volume):
+        _, pv, total_volume = self.next(high, low, close, volume)
+        return pv / total_volume if self.ready(self.count + 1) and total_volume else None
+
+    def state(self):
+        return {'window': self.window, 'bars': [list(b) for b in self.bars], 'count': self.count}
+
+    @classmethod
+    def restore(cls, state):
+        vwap = cls(state['window'])
+        vwap.bars.extend(tuple(b) for b in state['bars'])
+        vwap.count = state['count']
+        vwap.pv = math.fsum(b[0] for b in vwap.bars)
+        vwap.volume = math.fsum(b[1] for b in vwap.bars)
+        vwap.value = vwap.pv / vwap.volume if vwap.ready(vwap.count) and vwap.volume else None
+        return vwap
+
+
+class BarTracker:
+    # Keeps an indicator in step with a polled kline frame whose last row is the forming
+    # candle: closed bars are committed once, the forming one is only peeked at.
+    def __init__(self, make):
+        self.make = make
+        self.indicator = None
+        self.last = None
+
+    def sync(self, times, *columns):
+        times = np.asarray(times)
+        n = len(times) - 1
+        if self.indicator is None or self.last is None or self.last < times[0] or self.last > times[n - 1]:
+            # First call or a gap the frame does not cover: rebuild from the frame
+            self.indicator = self.make()
+            self.indicator.seed(*(c[:n] for c in columns))
+        else:
+            for i in range(int(np.searchsorted(times[:n], self.last, side='right')), n):
+                self.indicator.update(*(c[i] for c in columns))
+        self.last = times[n - 1]
+        return self.indicator.value, self.indicator.peek(*(c[n] for c in columns))
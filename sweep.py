@@ -0,0 +1,190 @@
+import csv
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtest import EFI, cross_signals
+from backtester import returns, simulate
+from indicatorcache import IndicatorCache
+from indicators import bollinger, ewm
+from klinedecode import OHLCV
+
+STRATEGIES = {}
+# Parameter sets with equal values for a strategy's `shared` names go to one worker in tasks
+# of up to CHUNK, so the indicator columns they have in common are computed once there
+CHUNK = 32
+
+
+class Strategy:
+    # func(bars, memo, **params) -> backtester.Trades; bars maps OHLCV names to shared arrays,
+    # memo(name, params, compute) caches indicator columns inside the worker.
+    def __init__(self, name, func, shared=()):
+        self.name = name
+        self.func = func
+        self.shared = tuple(shared)
+
+
+def register(name, shared=()):
+    def wrap(func):
+        STRATEGIES[name] = Strategy(name, func, shared)
+        return func
+    return wrap
+
+
+def grid(**axes):
+    # Every combination of the listed values
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def random_search(n, seed=None, **axes):
+    # n draws; a list is sampled as choices, a (low, high) tuple uniformly (integers if both ends are)
+    rng = random.Random(seed)
+
+    def draw(axis):
+        if isinstance(axis, tuple):
+            low, high = axis
+            return rng.randint(low, high) if isinstance(low, int) and isinstance(high, int) else rng.uniform(low, high)
+        return rng.choice(axis)
+
+    return [{name: draw(axis) for name, axis in axes.items()} for _ in range(n)]
+
+
+def metrics(trades):
+    r = returns(trades)
+    if len(r) == 0:
+        return {'trades': 0, 'win_rate': np.nan, 'total_return': 0.0, 'max_drawdown': 0.0}
+    equity = np.cumprod(1 + r)
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+    return {'trades': len(r), 'win_rate': float((r > 0).mean()), 'total_return': float(equity[-1] - 1),
+            'max_drawdown': float(drawdown.max())}
+
+
+_worker = {}
+
+
+def attach(name, shape):
+    # Pool initializer: map the parent's OHLCV block instead of receiving a copy per task
+    shm = shared_memory.SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _worker.update(shm=shm, bars=dict(zip(OHLCV, values)), cache=IndicatorCache(max_entries=256), key=(name,))
+
+
+def evaluate(strategy, param_sets):
+    memo = _worker['cache'].view(_worker['key'])
+    func = STRATEGIES[strategy].func
+    return [dict(params, **metrics(func(_worker['bars'], memo, **params))) for params in param_sets]
+
+
+def tasks(strategy, param_sets, chunk=CHUNK):
+    groups = {}
+    for params in param_sets:
+        key = tuple(params.get(name) for name in STRATEGIES[strategy].shared)
+        groups.setdefault(key, []).append(params)
+    for group in groups.values():
+        for i in range(0, len(group), chunk):
+            yield group[i:i + chunk]
+
+
+def sweep(strategy, values, param_sets, workers=None, out=None, sort='total_return'):
+    # values: (5 x bars) OHLCV array. Rows are written to `out` as they arrive; the sorted table is returned.
+    values = np.ascontiguousarray(values[:len(OHLCV)], dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    rows = []
+    writer = file = None
+    start = time.time()
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=attach,
+                                 initargs=(shm.name, values.shape)) as pool:
+            futures = [pool.submit(evaluate, strategy, chunk) for chunk in tasks(strategy, param_sets)]
+            for future in as_completed(futures):
+                for row in future.result():
+                    if out is not None and writer is None:
+                        file = open(out, "w", newline="")
+                        writer = csv.DictWriter(file, fieldnames=list(row))
+                        writer.writeheader()
+                    if writer is not None:
+                        writer.writerow(row)
+                    rows.append(row)
+                if file is not None:
+                    file.flush()
+    finally:
+        if file is not None:
+            file.close()
+        shm.close()
+        shm.unlink()
+    print(f"{len(rows)} configurations in {time.time() - start:.1f} s")
+    table = pd.DataFrame(rows)
+    return table.sort_values(sort, ascending=False, ignore_index=True) if len(table) else table
+
+
+def run(strategy, param_sets, symbol="BTCUSDT", interval="1h", limit=None, store=None, **kwargs):
+    # Prices come from the local KlineStore; limit=None sweeps the whole stored history
+    if store is None:
+        from klinestore import KlineStore
+        store = KlineStore()
+    block = store.read(symbol, interval, limit=limit)
+    print(f"{symbol} {interval}: {len(block)} bars, {len(param_sets)} configurations")
+    return sweep(strategy, block.values, param_sets, **kwargs)
+
+
+@register("efi_macd", shared=("efi_period", "fast", "slow", "signal"))
+def efi_macd(bars, memo, efi_period=13, fast=12, slow=26, signal=9, tp=0.02, sl=0.02):
+    # backtest.py
+    close = bars['close']
+    efi = memo('efi', efi_period, lambda: EFI(close, bars['volume'], efi_period))
+    line = memo('macd', (fast, slow), lambda: memo('ewm', fast, lambda: ewm(close, fast)) -
+                memo('ewm', slow, lambda: ewm(close, slow)))
+    line_signal = memo('macd_signal', (fast, slow, signal), lambda: ewm(line, signal))
+    long_signal, short_signal = memo('efi_macd', (efi_period, fast, slow, signal),
+                                     lambda: cross_signals(efi, line, line_signal))
+    return simulate(bars['high'], bars['low'], close, long_signal, tp=tp, sl=sl, long_exit=short_signal)
+
+
+@register("haha")
+def haha_pattern(bars, memo, price_change=0.01):
+    import haha
+    df = memo('haha', (), lambda: haha.macd_hist(pd.DataFrame(bars)))
+    return simulate(bars['high'], bars['low'], bars['close'], df['buy_signal'].values, df['sell_signal'].values,
+                    tp=price_change, sl=price_change, same_bar=True, stop_first=False)
+
+
+@register("charty")
+def charty_trend(bars, memo, tp=0.02, sl=0.01):
+    import charty
+
+    def signals():
+        df = pd.DataFrame(bars)
+        charty.calculate_signal(df)
+        return df['buy_signal'].values
+
+    buy = memo('charty', (), signals)
+    return simulate(bars['high'], bars['low'], bars['close'], buy, tp=tp, sl=sl, stop_first=False)
+
+
+@register("bollinger", shared=("period", "dev"))
+def bollinger_reversal(bars, memo, period=20, dev=2, tp=0.02, sl=0.02):
+    # bol.py: close back inside the band after closing outside it; the opposite signal exits
+    close = bars['close']
+
+    def signals():
+        _, high, low = bollinger(close, period, dev)
+        prev_close, prev_high, prev_low = close[:-1], high[:-1], low[:-1]
+        sell = np.concatenate([[False], (prev_close > prev_high) & (close[1:] < high[1:])])
+        buy = np.concatenate([[False], (prev_close < prev_low) & (close[1:] > low[1:])])
+        return buy, sell
+
+    buy, sell = memo('bollinger', (period, dev), signals)
+    return simulate(bars['high'], bars['low'], close, buy, sell, tp=tp, sl=sl, long_exit=sell, short_exit=buy)
+
+
+if __name__ == "__main__":
+    specs = grid(efi_period=[8, 13, 21], fast=[8, 12], slow=[21, 26], signal=[9],
+                 tp=[0.01, 0.02, 0.03], sl=[0.01, 0.02, 0.03])
+    table = run("efi_macd", specs, out="sweep_results.csv")
+    print(table.head(20).to_string())
@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from binance.error import ClientError
+
+CACHE_PATH = "exchange_info_cache.json"
+
+
+def build_index(exchange_info):
+    # symbol -> precision, tickSize, stepSize, minNotional
+    index = {}
+    for elem in exchange_info['symbols']:
+        info = {
+            'pricePrecision': elem['pricePrecision'],
+            'quantityPrecision': elem['quantityPrecision'],
+            'tickSize': None,
+            'stepSize': None,
+            'minNotional': None,
+            'status': elem.get('status'),
+            'contractType': elem.get('contractType'),
+            'quoteAsset': elem.get('quoteAsset'),
+            'marginAsset': elem.get('marginAsset'),
+        }
+        for f in elem.get('filters', []):
+            if f['filterType'] == 'PRICE_FILTER':
+                info['tickSize'] = float(f['tickSize'])
+            elif f['filterType'] == 'LOT_SIZE':
+                info['stepSize'] = float(f['stepSize'])
+            elif f['filterType'] == 'MIN_NOTIONAL':
+                info['minNotional'] = float(f.get('notional', f.get('minNotional', 0)))
+        index[elem['symbol']] = info
+    return index
+
+
+class SymbolInfo:
+    def __init__(self, client, path=CACHE_PATH, ttl=3600):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.symbols = {}
+        self.updated = 0
+        # Symbols a fresh download did not list; not looked up again until the next refresh
+        self.missing = set()
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.stopped = threading.Event()
+        self.thread = None
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            self.symbols = data['symbols']
+            self.updated = data['updated']
+        except (OSError, ValueError, KeyError) as err:
+            print(f"Symbol cache could not be read: {err}")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as file:
+            json.dump({'updated': self.updated, 'symbols': self.symbols}, file)
+        os.replace(tmp, self.path)
+
+    def update(self, exchange_info):
+        index = build_index(exchange_info)
+        with self.lock:
+            self.symbols = index
+            self.updated = time.time()
+            self.missing = set()
+        self.save()
+
+    def refresh(self):
+        try:
+            self.update(self.client.exchange_info())
+        except ClientError as error:
+            print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+            return False
+        return True
+
+    def is_stale(self):
+        return time.time() - self.updated > self.ttl
+
+    def refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def start(self):
+        # Periodic refresh so order paths never wait on exchangeInfo
+        if self.thread is not None:
+            return
+
+        def run():
+            while not self.stopped.is_set():
+                if self.is_stale():
+                    self.refresh()
+                self.stopped.wait(max(1, self.ttl - (time.time() - self.updated)))
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def lookup(self, symbol):
+        # (info, download): download is True for a symbol neither cached nor known to be missing
+        info = self.symbols.get(symbol)
+        if info is None and symbol not in self.missing:
+            return None, True
+        if self.is_stale():
+            self.refresh_in_background()
+        return info, False
+
+    def resolve(self, symbol):
+        # After the download asked for by lookup(): still unlisted symbols are cached as missing
+        info = self.symbols.get(symbol)
+        if info is None:
+            with self.lock:
+                self.missing.add(symbol)
+        return info
+
+    def get(self, symbol):
+        info, download = self.lookup(symbol)
+        if download:
+            # Unknown symbol (new listing or empty cache): one blocking download
+            self.refresh()
+            info = self.resolve(symbol)
+        return info
+
+    def precisions(self, symbol):
+        info = self.get(symbol)
+        if info is not None:
+            return info['pricePrecision'], info['quantityPrecision']
+
+
+_shared = {}
+
+
+def shared(client, path=CACHE_PATH, ttl=3600):
+    # One cache per file so every session in the process reads the same index
+    if path not in _shared:
+        _shared[path] = SymbolInfo(client, path, ttl)
+    return _shared[path]
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from indicators import WilderRSI, wilder_rsi, rolling_max, rolling_min, highest_age
+
+# ta seeds Wilder's averages from the first delta, wilder_rsi from the mean of the first
+# `period`; the difference decays by (period - 1) / period per bar
+WARMUP = 300
+
+
+def random_closes(symbols=20, bars=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.standard_normal((symbols, bars)) * 0.01, axis=1))
+
+
+def ta_rsi(row, period=14):
+    return RSIIndicator(pd.Series(row), window=period).rsi().to_numpy()
+
+
+def test_wilder_rsi_matches_ta():
+    closes = random_closes()
+    for period in (14, 6):
+        expected = np.array([ta_rsi(row, period) for row in closes])
+        result = wilder_rsi(closes, period)
+        assert result.shape == closes.shape
+        np.testing.assert_allclose(result[:, WARMUP:], expected[:, WARMUP:], atol=1e-8)
+        np.testing.assert_allclose(wilder_rsi(closes[3], period)[WARMUP:], expected[3, WARMUP:], atol=1e-8)
+
+
+def test_head_fills_only_the_seed():
+    closes = random_closes(symbols=5, bars=200)
+    seeded = wilder_rsi(closes, head=50)
+    assert (seeded[:, :14] == 50).all()
+    np.testing.assert_array_equal(seeded[:, 14:], wilder_rsi(closes)[:, 14:])
+
+
+def test_state_continues_like_a_full_pass():
+    closes = random_closes()
+    expected = np.array([ta_rsi(row) for row in closes])
+    for head in (None, 50):
+        rsi, (up, down, last) = wilder_rsi(closes[:, :-50], head=head, state=True)
+        np.testing.assert_array_equal(last, closes[:, -51])
+        engine = WilderRSI(head=head)
+        np.testing.assert_array_equal(engine.fit(closes[:, :-50]), rsi)
+        for t in range(closes.shape[1] - 50, closes.shape[1]):
+            step = engine.update(closes[:, t])
+            np.testing.assert_allclose(step, expected[:, t], atol=1e-8)
+        np.testing.assert_allclose(step, wilder_rsi(closes, head=head)[:, -1], atol=1e-9)
+
+
+def test_rolling_extremes_match_pandas():
+    highs = random_closes(symbols=5, bars=300)
+    highs[:, 150:160] = highs[:, 149:150]  # ties
+    for window in (1, 20, 26, 100, 300):
+        frame = pd.DataFrame(highs.T)
+        np.testing.assert_array_equal(rolling_max(highs, window), frame.rolling(window).max().to_numpy().T)
+        np.testing.assert_array_equal(rolling_min(highs, window), frame.rolling(window).min().to_numpy().T)
+        np.testing.assert_array_equal(rolling_max(highs[2], window), frame[2].rolling(window).max().to_numpy())
+    assert rolling_max(highs[:, :10], 20).shape == (5, 10)
+    # bars since the latest bar that made the high
+    for row in highs:
+        last = row[-100:]
+        assert highest_age(row, 100) == 99 - max(i for i, x in enumerate(last) if x == last.max())
+    np.testing.assert_array_equal(highest_age(highs, 100), [highest_age(row, 100) for row in highs])
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+from aiohttp import web
+from klinestream import KlineStream
+
+HOUR = 3_600_000
+HOST = "127.0.0.1"
+
+
+def candle(open_time, close=100.0):
+    return [open_time, str(close), str(close + 1), str(close - 1), str(close), "1", open_time + HOUR - 1,
+            "100", 3, "0.5", "50", "0"]
+
+
+class Exchange:
+    # REST klines plus a kline websocket; the first connection is dropped after one event
+    def __init__(self):
+        self.rest_calls = 0
+        self.connections = 0
+
+    def current(self):
+        return int(time.time() * 1000) // HOUR * HOUR
+
+    async def klines(self, request):
+        self.rest_calls += 1
+        limit = int(request.query['limit'])
+        end = min(self.current(), int(request.query.get('endTime', self.current())) // HOUR * HOUR)
+        times = range(end - (limit - 1) * HOUR, end + 1, HOUR)
+        return web.json_response([candle(t) for t in times])
+
+    async def stream(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        t = self.current()
+        k = {'t': t, 'T': t + HOUR - 1, 'i': '1h', 'o': '100', 'h': '150', 'l': '99', 'c': '150', 'v': '2',
+             'q': '300', 'n': 5, 'V': '1', 'Q': '150'}
+        await ws.send_str(json.dumps({'stream': 'xusdt@kline_1h', 'data': {'e': 'kline', 's': 'XUSDT', 'k': k}}))
+        if self.connections == 1:
+            await ws.close()
+        else:
+            async for _ in ws:
+                pass
+        return ws
+
+
+async def serve(exchange):
+    app = web.Application()
+    app.router.add_get('/klines', exchange.klines)
+    app.router.add_get('/stream', exchange.stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    # Port 0: the OS picks a free one
+    await web.TCPSite(runner, HOST, 0).start()
+    return runner, f"http://{HOST}:{runner.addresses[0][1]}"
+
+
+async def wait_for(condition, timeout=10):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end
+        await asyncio.sleep(0.05)
+
+
+def test_stream_reseeds_and_falls_back():
+    async def main():
+        exchange = Exchange()
+        runner, url = await serve(exchange)
+        stream = KlineStream(size=1616, url=f"{url}/stream", rest_url=f"{url}/klines")
+        try:
+            await stream.start(["XUSDT"], ["1h"])
+            # 1616 candles take two REST pages; the reconnect after the dropped connection seeds again
+            await wait_for(lambda: exchange.connections == 2 and stream.klines("XUSDT", "1h", 1616) is not None)
+            assert exchange.rest_calls == 4
+            block = stream.klines("XUSDT", "1h", 1616)
+            assert len(block) == 1616
+            assert (block.time[1:] - block.time[:-1] == HOUR).all()
+            assert block.close[-1] == 150  # websocket event on top of the seed
+            assert stream.klines("XUSDT", "1h", 1617) is None
+            assert stream.klines("XUSDT", "1h", 100, now_ms=int(block.time[-1]) + 2 * HOUR) is None
+            assert stream.klines("YUSDT", "1h", 100) is None
+        finally:
+            await stream.stop()
+            await runner.cleanup()
+
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import RSIIndicator
+from ta.trend import EMAIndicator, SMAIndicator, WMAIndicator, MACD as TaMACD
+from ta.volatility import AverageTrueRange, BollingerBands
+from ta.volume import OnBalanceVolumeIndicator, VolumeWeightedAveragePrice
+from streaming import EMA, SMA, WMA, HMA, Bollinger, RSI, MACD, ATR, OBV, VWAP
+
+BARS = 600
+
+
+def random_bars(bars=BARS, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.standard_normal(bars) * 0.01))
+    high = close * (1 + rng.random(bars) * 0.01)
+    low = close * (1 - rng.random(bars) * 0.01)
+    volume = rng.random(bars) * 1000 + 1
+    return pd.DataFrame({'high': high, 'low': low, 'close': close, 'volume': volume})
+
+
+def hma(close, period):
+    half = WMAIndicator(close, period // 2).wma()
+    full = WMAIndicator(close, period).wma()
+    return WMAIndicator(2 * half - full, int(np.sqrt(period))).wma()
+
+
+# name -> (factory, columns fed to update(), ta reference, value -> float)
+CASES = {
+    'ema': (lambda: EMA(20), ['close'], lambda df: EMAIndicator(df.close, 20).ema_indicator(), float),
+    'sma': (lambda: SMA(20), ['close'], lambda df: SMAIndicator(df.close, 20).sma_indicator(), float),
+    'wma': (lambda: WMA(20), ['close'], lambda df: WMAIndicator(df.close, 20).wma(), float),
+    'hma': (lambda: HMA(30), ['close'], lambda df: hma(df.close, 30), float),
+    'bollinger': (lambda: Bollinger(20, 2), ['close'],
+                  lambda df: BollingerBands(df.close, 20, 2).bollinger_hband(), lambda band: band.high),
+    'rsi': (lambda: RSI(14), ['close'], lambda df: RSIIndicator(df.close, 14).rsi(), float),
+    'macd': (lambda: MACD(12, 26, 9), ['close'], lambda df: TaMACD(df.close, 26, 12, 9).macd_signal(),
+             lambda macd: macd.signal),
+    'atr': (lambda: ATR(14), ['high', 'low', 'close'],
+            lambda df: AverageTrueRange(df.high, df.low, df.close, 14).average_true_range().where(df.index >= 13),
+            float),
+    'obv': (lambda: OBV(), ['close', 'volume'],
+            lambda df: OnBalanceVolumeIndicator(df.close, df.volume).on_balance_volume(), float),
+    'vwap': (lambda: VWAP(14), ['high', 'low', 'close', 'volume'],
+             lambda df: VolumeWeightedAveragePrice(df.high, df.low, df.close, df.volume, 14)
+             .volume_weighted_average_price(), float),
+}
+
+
+def run(indicator, rows, pick):
+    return np.array([np.nan if (v := indicator.update(*row)) is None or pick(v) is None else pick(v) for row in rows])
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_matches_ta(name):
+    make, columns, reference, pick = CASES[name]
+    df = random_bars()
+    rows = list(df[columns].itertuples(index=False))
+    np.testing.assert_allclose(run(make(), rows, pick), reference(df).to_numpy(), rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_peek_does_not_commit(name):
+    make, columns, _, pick = CASES[name]
+    rows = list(random_bars()[columns].itertuples(index=False))
+    indicator = make()
+    for row in rows:
+        before = indicator.value
+        peeked = indicator.peek(*row)
+        assert indicator.value is before
+        committed = indicator.update(*row)
+        if committed is None or pick(committed) is None:
+            continue
+        assert pick(peeked) == pytest.approx(pick(committed), rel=1e-12)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_state_round_trip(name):
+    make, columns, _, pick = CASES[name]
+    rows = list(random_bars()[columns].itertuples(index=False))
+    for cut in (5, BARS // 2):
+        indicator = make()
+        indicator.seed(*zip(*rows[:cut]))
+        cls = type(indicator)
+        # signal_state.json round trip
+        resumed = cls.restore(json.loads(json.dumps(indicator.state())))
+        assert (resumed.value is None) == (indicator.value is None)
+        np.testing.assert_allclose(run(resumed, rows[cut:], pick), run(indicator, rows[cut:], pick),
+                                   rtol=1e-12, equal_nan=True)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import random
+import time
+from urllib.parse import parse_qsl, urlsplit
+import aiohttp
+
+BASE_URL = "https://fapi.binance.com"
+RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+# Request weights of the public endpoints the scanners use; anything else counts as 1
+WEIGHTS = {
+    '/fapi/v1/ticker/24hr': 40,
+    '/fapi/v1/exchangeInfo': 1,
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/ticker/24hr': 80,
+}
+
+
+def request_weight(path, params=None):
+    params = params or {}
+    if path.endswith('/klines'):
+        limit = int(params.get('limit', 500))
+        if path.startswith('/api/'):
+            return 2
+        return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+    if path.endswith('/ticker/24hr') and 'symbol' in params:
+        return 1
+    return WEIGHTS.get(path, 1)
+
+
+class WeightLimiter:
+    # Binance counts weight per IP in fixed one-minute windows and reports the
+    # running total in X-MBX-USED-WEIGHT-1M. Requests reserve their weight up
+    # front and the header corrects the count after each response.
+    def __init__(self, limit=2400, safety=0.9):
+        self.capacity = int(limit * safety)
+        self.used = 0
+        self.window = int(time.time() // 60)
+        self.resume_at = 0
+
+    def roll(self):
+        window = int(time.time() // 60)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    async def acquire(self, weight):
+        while True:
+            if time.time() < self.resume_at:
+                await asyncio.sleep(self.resume_at - time.time())
+                continue
+            self.roll()
+            if self.used + weight <= self.capacity:
+                self.used += weight
+                return
+            await asyncio.sleep(60 - time.time() % 60 + 0.1)
+
+    def observe(self, headers):
+        used = headers.get('X-MBX-USED-WEIGHT-1M')
+        if used is not None:
+            self.roll()
+            self.used = max(self.used, int(used))
+
+    def pause(self, seconds):
+        # After 429/418 nothing goes out until Retry-After has passed
+        self.resume_at = max(self.resume_at, time.time() + seconds)
+
+
+class Transport:
+    def __init__(self, base_url=BASE_URL, headers=None, concurrency=20, weight_limit=2400, retries=4, timeout=10, resolver=None):
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.limiter = WeightLimiter(weight_limit)
+        self.retries = retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.resolver = resolver
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency,
+                                         ttl_dns_cache=300, keepalive_timeout=60, resolver=self.resolver)
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+
+    def backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return float(retry_after)
+        # Full jitter: spread retries so a burst of failures does not come back in lockstep
+        return random.uniform(0, min(30, 0.5 * 2 ** attempt))
+
+    async def get(self, url, params=None, raw=False, weight=None):
+        # Returns parsed JSON (or bytes with raw=True), None when the request finally fails
+        if not url.startswith('http'):
+            url = f"{self.base_url}{url}"
+        parts = urlsplit(url)
+        path = parts.path
+        weight = weight or request_weight(path, {**dict(parse_qsl(parts.query)), **(params or {})})
+        for attempt in range(self.retries + 1):
+            await self.limiter.acquire(weight)
+            retry_after = None
+            try:
+                async with self.semaphore:
+                    async with self.session.get(url, params=params) as resp:
+                        self.limiter.observe(resp.headers)
+                        body = await resp.read()
+                        if resp.status < 400:
+                            return body if raw else json.loads(body)
+                        if resp.status not in RETRY_STATUS:
+                            print(f"Fetch error {resp.status} {path}: {body[:200]!r}")
+                            return None
+                        retry_after = resp.headers.get('Retry-After')
+                        if resp.status in (418, 429):
+                            self.limiter.pause(float(retry_after or 60))
+                        error = f"HTTP {resp.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                error = repr(e)
+            if attempt == self.retries:
+                print(f"Fetch error {path}: {error}")
+                return None
+            await asyncio.sleep(self.backoff(attempt, retry_after))
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+import numpy as np
+from binance.error import ClientError
+
+FUTURES_URL = "https://fapi.binance.com"
+SPOT_URL = "https://api.binance.com"
+TEXT_COLUMNS = ('symbol', 'status', 'contractType', 'quoteAsset', 'marginAsset')
+NUMBER_COLUMNS = ('quoteVolume', 'volume', 'lastPrice', 'priceChangePercent')
+
+
+def build_table(exchange_info, tickers=None):
+    # exchangeInfo rows joined with 24hr stats; symbols without a ticker (or tickers=None) get zero volume
+    stats = {t['symbol']: t for t in tickers or ()}
+    rows = exchange_info['symbols']
+    table = {name: np.array([row.get(name) or '' for row in rows], dtype=str) for name in TEXT_COLUMNS}
+    for name in NUMBER_COLUMNS:
+        table[name] = np.array([float(stats.get(row['symbol'], {}).get(name, 0)) for row in rows])
+    return table
+
+
+def uses_volume(filters):
+    return filters.get('min_volume', 0) > 0 or filters.get('sort', False)
+
+
+class Universe:
+    # Tradable symbols with their 24hr stats in one columnar table. Filters are
+    # numpy masks and their results are memoized until the next refresh.
+    def __init__(self, base_url=FUTURES_URL, ttl=300):
+        self.base_url = base_url
+        self.prefix = '/api/v3' if base_url.startswith(SPOT_URL) else '/fapi/v1'
+        self.ttl = ttl
+        self.table = None
+        self.updated = 0
+        # The 24hr ticker download is only made for volume filters and sorting
+        self.volumes = False
+        self.selections = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def update(self, exchange_info, tickers=None):
+        table = build_table(exchange_info, tickers)
+        with self.lock:
+            self.table = table
+            self.volumes = tickers is not None
+            self.selections = {}
+            self.updated = time.time()
+
+    def is_stale(self):
+        return self.table is None or time.time() - self.updated > self.ttl
+
+    def needs_refresh(self, volumes):
+        return self.is_stale() or (volumes and not self.volumes)
+
+    async def refresh_async(self, session, volumes=True):
+        # session: transport.Transport
+        requests = [session.get(f"{self.base_url}{self.prefix}/exchangeInfo")]
+        if volumes:
+            requests.append(session.get(f"{self.base_url}{self.prefix}/ticker/24hr"))
+        results = await asyncio.gather(*requests)
+        if any(r is None for r in results):
+            return False
+        self.update(*results)
+        return True
+
+    def refresh(self, client, volumes=True):
+        # client: binance UMFutures
+        try:
+            self.update(client.exchange_info(), client.ticker_24hr_price_change() if volumes else None)
+        except ClientError as error:
+            print(f"Found error. status: {error.status_code}, error code: {error.error_code}, error message: {error.error_message}")
+            return False
+        return True
+
+    def start(self, client):
+        # Periodic refresh in the background for long-running bots
+        if self.thread is not None:
+            return
+
+        def run():
+            while not self.stopped.is_set():
+                if self.is_stale():
+                    self.refresh(client, self.volumes)
+                self.stopped.wait(max(1, self.ttl - (time.time() - self.updated)))
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def select(self, min_volume=0, quote='USDT', margin=None, contract='PERPETUAL', status='TRADING', blacklist=(),
+               sort=False):
+        key = (min_volume, quote, margin, contract, status, tuple(blacklist), sort)
+        cached = self.selections.get(key)
+        if cached is not None:
+            return list(cached)
+        table = self.table
+        if table is None:
+            return []
+        mask = table['quoteVolume'] >= min_volume
+        if quote is not None:
+            mask &= table['quoteAsset'] == quote
+        if margin is not None:
+            mask &= table['marginAsset'] == margin
+        if contract is not None and self.prefix == '/fapi/v1':
+            mask &= table['contractType'] == contract
+        if status is not None:
+            mask &= table['status'] == status
+        if blacklist:
+            mask &= ~np.isin(table['symbol'], list(blacklist))
+        index = np.flatnonzero(mask)
+        if sort:
+            # Highest quote volume first
+            index = index[np.argsort(-table['quoteVolume'][index], kind='stable')]
+        symbols = tuple(table['symbol'][index].tolist())
+        self.selections[key] = symbols
+        return list(symbols)
+
+    async def load(self, session, volumes=False):
+        if self.needs_refresh(volumes):
+            await self.refresh_async(session, volumes)
+
+    async def symbols(self, session, **filters):
+        await self.load(session, uses_volume(filters))
+        return self.select(**filters)
+
+    def symbols_sync(self, client, **filters):
+        volumes = uses_volume(filters)
+        if self.needs_refresh(volumes):
+            self.refresh(client, volumes)
+        return self.select(**filters)
+
+
+_shared = {}
+
+
+def shared(base_url=FUTURES_URL, ttl=300):
+    # One table per API so every scanner in the process filters the same download
+    if base_url not in _shared:
+        _shared[base_url] = Universe(base_url, ttl)
+    return _shared[base_url]
@@ -1,7 +1,7 @@
 import asyncio
-import aiohttp
 from datetime import datetime, timezone, timedelta
 import sys
+from transport import Transport
 
 if sys.platform.startswith('win'):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -17,9 +17,7 @@ async def fetch_klines(session, symbol, interval, start_time=None, limit=500):
     }
     if start_time:
         params["startTime"] = int(start_time.timestamp() * 1000)
-    async with session.get(url, params=params) as resp:
-        data = await resp.json()
-        return data
+    return await session.get(url, params)
 
 def calculate_cvd(klines):
     # klines = list of lists, each kline = [open_time, open, high, low, close, volume, ...]
@@ -50,7 +48,7 @@ async def main():
 
     print(f"Anchor start time UTC: {anchor}")
 
-    async with aiohttp.ClientSession() as session:
+    async with Transport(BASE_URL) as session:
         klines = await fetch_klines(session, symbol, interval, start_time=anchor, limit=100)
         
         if not klines:
@@ -2,20 +2,31 @@ import pandas as pd
 import numpy as np
 from binance.um_futures import UMFutures
 from xconfig import BINANCE_API_KEY, BINANCE_SECRET_KEY
+from resample import base_interval, base_limit, resample, resample_pays
+from universe import shared
+from klinecache import KlineCache
 
 # Binance client
 client = UMFutures(key=BINANCE_API_KEY, secret=BINANCE_SECRET_KEY)
+universe = shared()
+# Kapanmış mumlar bellekte/diskte tutulur, tekrar taramada sadece yeni mumlar iner
+cache = KlineCache(client)
 
 def get_all_futures_symbols():
     """Binance UM Futures'taki tüm işlem çiftlerini alır."""
-    exchange_info = client.exchange_info()
-    return [symbol['symbol'] for symbol in exchange_info['symbols'] if symbol['contractType'] == 'PERPETUAL' and symbol['marginAsset'] == 'USDT']
+    return universe.symbols_sync(client, quote=None, margin='USDT', status=None)
 
 def get_historical_klines(symbol, interval, limit=50):
     """Belirtilen sembol için kapanış fiyatlarını alır."""
-    klines = client.klines(symbol=symbol, interval=interval, limit=limit)
-    closes = np.array([float(k[4]) for k in klines])  # Kapanış fiyatları
-    return closes
+    return cache.get(symbol, interval, limit).close  # Kapanış fiyatları
+
+def get_multi_interval_closes(symbol, intervals, limit=50):
+    """En küçük periyot tek seferde çekilip diğerleri ondan türetilir; bu daha ağırsa her periyot ayrı çekilir."""
+    if not resample_pays(intervals, limit):
+        return {interval: get_historical_klines(symbol, interval, limit) for interval in intervals}
+    base = base_interval(intervals)
+    klines = cache.get(symbol, base, base_limit(intervals, limit))
+    return {interval: resample(klines, interval, base).close[-limit:] for interval in intervals}
 
 def calculate_standard_deviation(prices, window=50):
     """Standart sapma hesaplar."""
@@ -36,9 +47,10 @@ def find_anomalies():
     
     for symbol in symbols:
         try:
-            prices_1h = get_historical_klines(symbol, "1h")
-            prices_15m = get_historical_klines(symbol, "15m")
-            prices_5m = get_historical_klines(symbol, "5m")
+            closes = get_multi_interval_closes(symbol, ["1h", "15m", "5m"])
+            prices_1h = closes["1h"]
+            prices_15m = closes["15m"]
+            prices_5m = closes["5m"]
             
             if len(prices_1h) < 50 or len(prices_15m) < 50 or len(prices_5m) < 50:
                 continue  # Yetersiz veri olanları atla